@@ -1,22 +1,341 @@
-from flask import Flask, request, render_template, send_file, jsonify
+from flask import Flask, Response, request, render_template, send_file, jsonify
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+import inspect
+import json
 import os
 import openai
 import re
 import shutil
+import threading
+import uuid
 import zipfile  # Import the zipfile module
-from faster_whisper import WhisperModel
+import ctranslate2
+from faster_whisper import TranscriptionCache, WhisperModel
+from faster_whisper.audio import hash_audio
+from faster_whisper.vad import VadOptions
 
 app = Flask(__name__)
 
-# Define global variables to store transcription results and text file paths
-transcription_results = []
-txt_file_paths = []  # Initialize the list for text file paths
+# Model settings, overridable from the environment (or the .env file)
+load_dotenv()
+MODEL_SIZE = os.getenv('WHISPER_MODEL_SIZE', 'medium.en')
+# Concurrent transcriptions per model
+MODEL_NUM_WORKERS = int(os.getenv('WHISPER_NUM_WORKERS', '2'))
+MODEL_CPU_THREADS = int(os.getenv('WHISPER_CPU_THREADS', '0'))  # 0 keeps the CTranslate2 default
+
+
+class ModelRegistry:
+    """Loads each (model size, device, compute type) once and shares it between requests.
+
+    A WhisperModel is safe to use from several threads: with num_workers > 1, concurrent
+    transcribe() calls run in parallel on the same weights instead of each request loading
+    its own copy.
+    """
+
+    def __init__(self, num_workers=1, cpu_threads=0):
+        self.num_workers = num_workers
+        self.cpu_threads = cpu_threads
+        self._models = {}
+        self._device = None
+        self._lock = threading.Lock()
+
+    def probe_device(self, model_size):
+        # Only try CUDA once per process; a failed load costs several seconds
+        if self._device is None:
+            self._device = ('cpu', 'int8')
+
+            if ctranslate2.get_cuda_device_count() > 0:
+                try:
+                    self._load(model_size, 'cuda', 'float16')
+                    self._device = ('cuda', 'float16')
+                except Exception as gpu_error:
+                    print(f"GPU not available: {gpu_error}")
+
+            print(f"Using device '{self._device[0]}' with compute type '{self._device[1]}'")
+
+        return self._device
+
+    def get(self, model_size, device=None, compute_type=None):
+        with self._lock:
+            if device is None:
+                device, default_compute_type = self.probe_device(model_size)
+                compute_type = compute_type or default_compute_type
+
+            return self._load(model_size, device, compute_type or 'default')
+
+    def _load(self, model_size, device, compute_type):
+        key = (model_size, device, compute_type)
+        model = self._models.get(key)
+
+        if model is None:
+            model = WhisperModel(
+                model_size,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers,
+            )
+            self._models[key] = model
+
+        return model
+
+
+model_registry = ModelRegistry(num_workers=MODEL_NUM_WORKERS, cpu_threads=MODEL_CPU_THREADS)
 
 # Create the 'temp' directory if it doesn't exist
 if not os.path.exists('temp'):
     os.makedirs('temp')
 
+# Transcription jobs run in the background on a bounded pool of worker threads
+JOB_WORKERS = int(os.getenv('TRANSCRIPTION_JOB_WORKERS', str(MODEL_NUM_WORKERS)))
+MAX_PENDING_JOBS = int(os.getenv('TRANSCRIPTION_MAX_PENDING_JOBS', '16'))
+MAX_FINISHED_JOBS = 10  # Older finished jobs (and their files) are removed
+# Files transcribed in parallel
+FILES_PER_JOB = int(os.getenv('TRANSCRIPTION_FILES_PER_JOB', str(MODEL_NUM_WORKERS)))
+
+# Decoding the audio while it is transcribed returns the first segments sooner, but the
+# features are normalized with the maximum value decoded so far instead of the maximum
+# of the whole file, so the transcripts of files longer than 30s can differ
+STREAMING = os.getenv('WHISPER_STREAMING', '0') == '1'
+
+# Options passed to transcribe() for every file, also part of the result cache keys
+TRANSCRIBE_OPTIONS = {'beam_size': 5, 'streaming': STREAMING}
+
+
+def get_cache_key_options():
+    """Returns all the options of transcribe(), including the defaults not set in
+    TRANSCRIBE_OPTIONS, so that changing a default or a VAD setting changes the keys."""
+    parameters = inspect.signature(WhisperModel.transcribe).parameters
+    options = {
+        name: parameter.default
+        for name, parameter in parameters.items()
+        if parameter.default is not inspect.Parameter.empty
+    }
+    options.update(TRANSCRIBE_OPTIONS)
+
+    # The cache does not change the result
+    options.pop('feature_cache', None)
+
+    vad_parameters = options.pop('vad_parameters', None)
+    if not isinstance(vad_parameters, VadOptions):
+        vad_parameters = VadOptions(**(vad_parameters or {}))
+    options['vad_options'] = vad_parameters
+
+    return options
+
+
+# Transcription results are cached on disk, so a file uploaded again is not transcribed again
+CACHE_DIR = os.getenv('TRANSCRIPTION_CACHE_DIR', 'cache')
+# Least recently used results are removed above this size
+CACHE_MAX_MB = int(os.getenv('TRANSCRIPTION_CACHE_MAX_MB', '512'))
+result_cache = TranscriptionCache(CACHE_DIR, max_size=CACHE_MAX_MB * 1024 * 1024)
+
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='transcription')
+jobs = {}  # Job id -> TranscriptionJob, in creation order
+jobs_lock = threading.Lock()
+
+
+class TranscriptionJob:
+    """State of a transcription job, shared between the worker and the status endpoints."""
+
+    def __init__(self, filenames):
+        self.id = uuid.uuid4().hex
+        self.directory = os.path.join('temp', self.id)
+        self.status = 'queued'  # queued -> running -> done | error
+        self.error = None
+        self.zip_path = None
+        self.files = []
+        # Uploads are stored under their index, since several files can have the same name
+        self.audio_paths = []
+
+        names = set()
+        for index, filename in enumerate(filenames):
+            # The name of the .txt and .vtt files, made unique within the job
+            name = base_name = os.path.splitext(filename)[0]
+            copy_number = 1
+            while name in names:
+                copy_number += 1
+                name = f'{base_name} ({copy_number})'
+            names.add(name)
+
+            self.files.append({
+                'filename': filename,
+                'name': name,
+                'status': 'queued',
+                'progress': 0.0,
+            })
+            self.audio_paths.append(os.path.join(self.directory, f'{index}_{filename}'))
+
+        # Incremented on every change so that event streams only send new states
+        self.version = 0
+        self.changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'error')
+
+    def update(self, file_index=None, **changes):
+        with self.changed:
+            if file_index is None:
+                self.__dict__.update(changes)
+            else:
+                self.files[file_index].update(changes)
+            self.version += 1
+            self.changed.notify_all()
+
+    def wait_for_change(self, version, timeout=None):
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version
+
+    def to_dict(self):
+        with self.changed:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'error': self.error,
+                'files': [dict(file) for file in self.files],
+                'download_url': f'/jobs/{self.id}/download' if self.status == 'done' else None,
+            }
+
+
+def get_job(job_id):
+    with jobs_lock:
+        return jobs.get(job_id)
+
+
+def prune_finished_jobs():
+    """Removes the oldest finished jobs and their files."""
+    with jobs_lock:
+        finished = [job for job in jobs.values() if job.finished]
+        expired = finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]
+        for job in expired:
+            del jobs[job.id]
+
+    for job in expired:
+        shutil.rmtree(job.directory, ignore_errors=True)
+
+
+def write_transcription_files(directory, name, transcription_text):
+    """Writes the .txt and .vtt files for a transcription and returns the .txt path."""
+    txt_file_path = os.path.join(directory, f'{name}.txt')
+    vtt_file_path = os.path.join(directory, f'{name}.vtt')
+
+    with open(txt_file_path, 'w') as text_file, open(vtt_file_path, 'w') as vtt_file:
+        lines = transcription_text.strip().split('\n')
+        vtt_file.write("WEBVTT\n\n")
+
+        i = 1  # Initialize line number
+        for line in lines:
+            timestamp_start = f"{i * 3:02d}.100"
+            timestamp_end = f"{(i + 1) * 3:02d}.830"
+
+            if i == 1:
+                text_file.write(f">> {line}\n")
+            else:
+                text_file.write(f"{line}\n")
+
+            vtt_file.write(f"{i}\n")
+            vtt_file.write(f"00:00:{timestamp_start} --> 00:00:{timestamp_end}\n")
+            vtt_file.write(re.sub(r'\[\d+\.\d+s -> \d+\.\d+s\] ', '', line) + "\n\n")
+
+            i += 1  # Increment line number
+
+    return txt_file_path
+
+
+def report_segment(job, file_index, segment, info):
+    """Records the progress of a file after each transcribed segment."""
+    print("[%.2fs -> %.2fs] %s" % (segment.start, segment.end, segment.text))
+
+    # Calculate progress percentage based on segment.end compared to total duration
+    total_duration = info.duration  # Total duration of the audio file
+    progress_percentage = 0.0
+    if total_duration:
+        progress_percentage = min(100.0, (segment.end / total_duration) * 100)
+    job.update(file_index, status='transcribing', progress=round(progress_percentage, 2))
+
+
+def run_transcription_job(job):
+    job.update(status='running')
+
+    try:
+        # Reuse the process-wide model (CUDA float16 if available, otherwise CPU INT8)
+        model = model_registry.get(MODEL_SIZE)
+        device, compute_type = model_registry.probe_device(MODEL_SIZE)
+        model_id = f'{MODEL_SIZE}/{device}/{compute_type}'
+
+        audio_file_paths = job.audio_paths
+        txt_file_paths = [None] * len(audio_file_paths)
+        cache_key_options = get_cache_key_options()
+        cache_keys = [
+            result_cache.make_key(hash_audio(audio_file_path), model_id, **cache_key_options)
+            for audio_file_path in audio_file_paths
+        ]
+
+        def save_transcription(file_index, segments):
+            transcription_text = ""
+            for segment in segments:
+                transcription_text += (
+                    f"[{segment.start:.2f}s -> {segment.end:.2f}s] {segment.text}\n"
+                )
+
+            # Remove the temporary audio file
+            os.remove(audio_file_paths[file_index])
+
+            txt_file_paths[file_index] = write_transcription_files(
+                job.directory, job.files[file_index]['name'], transcription_text
+            )
+            job.update(file_index, status='done', progress=100.0)
+
+        # Files transcribed before (e.g. uploaded again under another name) are not decoded again
+        pending_indices = []
+        for file_index, cache_key in enumerate(cache_keys):
+            cached_result = result_cache.get(cache_key)
+            if cached_result is None:
+                pending_indices.append(file_index)
+            else:
+                save_transcription(file_index, cached_result[0])
+
+        # Files of the job are transcribed in parallel on the model workers
+        def report_pending_segment(index, segment, info):
+            report_segment(job, pending_indices[index], segment, info)
+
+        results = model.transcribe_many(
+            [audio_file_paths[file_index] for file_index in pending_indices],
+            max_concurrency=FILES_PER_JOB,
+            segment_callback=report_pending_segment,
+            **TRANSCRIBE_OPTIONS,
+        )
+
+        for index, segments, info in results:
+            file_index = pending_indices[index]
+            print(
+                f"Detected language '{info.language}' "
+                f"with probability {info.language_probability}"
+            )
+
+            result_cache.put(cache_keys[file_index], segments, info)
+            save_transcription(file_index, segments)
+
+        # Generate a single .zip file containing both .txt and .vtt files
+        zip_path = os.path.join(job.directory, 'transcriptions.zip')
+        with zipfile.ZipFile(zip_path, 'w') as zipf:
+            for txt_file_path in txt_file_paths:
+                zipf.write(txt_file_path, os.path.basename(txt_file_path))
+                vtt_file_path = txt_file_path.replace('.txt', '.vtt')
+                if os.path.exists(vtt_file_path):
+                    zipf.write(vtt_file_path, os.path.basename(vtt_file_path))
+
+        job.update(status='done', zip_path=zip_path)
+
+    except Exception as e:
+        # Handle exceptions here
+        print(f"Transcription job {job.id} failed: {e}")
+        job.update(status='error', error="An error occurred during transcription: " + str(e))
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -28,127 +347,76 @@ def transcribe_audio():
     audio_files = request.files.getlist('audio_files')
 
     if not audio_files:
-        return "No files provided."
-
-    try:
-        # Check if GPU is available
-        use_gpu = False
-        try:
-            # Attempt to create a WhisperModel with GPU support
-            model_size = "medium.en"
-            model = WhisperModel(model_size, device="cuda", compute_type="float16")
-            use_gpu = True
-        except Exception as gpu_error:
-            print(f"GPU not available: {gpu_error}")
-
-        # If GPU is not available, use CPU with INT8
-        if not use_gpu:
-            model = WhisperModel(model_size, device="cpu", compute_type="int8")
-
-        # Clear the 'temp' directory if it contains any files
-        temp_directory = 'temp'
-        for filename in os.listdir(temp_directory):
-            file_path = os.path.join(temp_directory, filename)
-            try:
-                if os.path.isfile(file_path):
-                    os.unlink(file_path)
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-            except Exception as e:
-                print(f"Failed to remove {file_path}: {e}")
-
-        # Remove previously generated .zip file
-        for filename in os.listdir(os.getcwd()):
-            if filename.endswith('.zip'):
-                os.unlink(filename)
-
-        transcription_results = []  # Store transcription results
-        txt_file_paths = []
-
-        for audio_file in audio_files:
-            # Determine the file extension
-            file_extension = os.path.splitext(audio_file.filename)[1].lower()
+        return jsonify({"error": "No files provided."}), 400
 
-            if file_extension in ('.mp3', '.mp4'):
-                # Save the uploaded file to a temporary location
-                audio_file_path = os.path.join("temp", audio_file.filename)
-                audio_file.save(audio_file_path)
+    filenames = [os.path.basename(audio_file.filename) for audio_file in audio_files]
 
-                segments, info = model.transcribe(audio_file_path, beam_size=5)
+    for filename in filenames:
+        # Determine the file extension
+        file_extension = os.path.splitext(filename)[1].lower()
 
-                print(f"Detected language '{info.language}' with probability {info.language_probability}")
+        if file_extension not in ('.mp3', '.mp4'):
+            error = f"Invalid file type: {filename}. Supported types: .mp3 and .mp4"
+            return jsonify({"error": error}), 400
 
-                transcription_text = ""
+    prune_finished_jobs()
 
-                total_duration = info.duration  # Total duration of the audio file
+    with jobs_lock:
+        pending_jobs = sum(1 for job in jobs.values() if not job.finished)
+        if pending_jobs >= MAX_PENDING_JOBS:
+            error = "Too many transcription jobs in progress, please retry later."
+            return jsonify({"error": error}), 503
 
-                for segment in segments:
-                    print("[%.2fs -> %.2fs] %s" % (segment.start, segment.end, segment.text))
+        job = TranscriptionJob(filenames)
+        jobs[job.id] = job
 
-                    # Calculate progress percentage based on segment.end compared to total duration
-                    progress_percentage = (segment.end / total_duration) * 100
-                    print(f"Transcription progress: {progress_percentage:.2f}%")
+    # Save the uploaded files to the job directory before returning the response
+    os.makedirs(job.directory)
+    for audio_file, audio_path in zip(audio_files, job.audio_paths):
+        audio_file.save(audio_path)
 
-                    transcription_text += f"[{segment.start:.2f}s -> {segment.end:.2f}s] {segment.text}\n"
+    job_executor.submit(run_transcription_job, job)
 
-                transcription_results.append((audio_file.filename, transcription_text))
+    return jsonify(job.to_dict()), 202
 
-                # Remove the temporary audio file
-                os.remove(audio_file_path)
-            else:
-                return f"Invalid file type: {audio_file.filename}. Supported types: .mp3 and .mp4"
 
-        # Create and save .txt and .vtt files
-        txt_file_paths = []
-        vtt_file_paths = []
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job."}), 404
 
-        for filename, transcription_text in transcription_results:
-            txt_file_path = os.path.join('temp', f'{os.path.splitext(filename)[0]}.txt')
-            vtt_file_path = os.path.join('temp', f'{os.path.splitext(filename)[0]}.vtt')
+    return jsonify(job.to_dict())
 
-            with open(txt_file_path, 'w') as text_file, open(vtt_file_path, 'w') as vtt_file:
-                lines = transcription_text.strip().split('\n')
-                vtt_file.write("WEBVTT\n\n")
 
-                i = 1  # Initialize line number
-                for line in lines:
-                    timestamp_start = f"{i * 3:02d}.100"
-                    timestamp_end = f"{(i + 1) * 3:02d}.830"
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job."}), 404
 
-                    if i == 1:
-                        text_file.write(f">> {line}\n")
-                    else:
-                        text_file.write(f"{line}\n")
+    def stream():
+        version = None
+        while True:
+            if version != job.version:
+                version = job.version
+                yield f"data: {json.dumps(job.to_dict())}\n\n"
+                if job.finished:
+                    break
+            elif job.wait_for_change(version, timeout=15) == version:
+                # Keep the connection alive while a long file is being decoded
+                yield ": keep-alive\n\n"
 
-                    vtt_file.write(f"{i}\n")
-                    vtt_file.write(f"00:00:{timestamp_start} --> 00:00:{timestamp_end}\n")
-                    vtt_file.write(re.sub(r'\[\d+\.\d+s -> \d+\.\d+s\] ', '', line) + "\n\n")
-                    
-                    i += 1  # Increment line number
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
-            txt_file_paths.append(txt_file_path)
-            vtt_file_paths.append(vtt_file_path)
 
-        # Generate a single .zip file containing both .txt and .vtt files
-        if len(txt_file_paths) > 0:
-            zip_filename = 'transcriptions.zip'
-            with zipfile.ZipFile(zip_filename, 'w') as zipf:
-                for txt_file_path in txt_file_paths:
-                    zipf.write(txt_file_path, os.path.basename(txt_file_path))
-                    vtt_file_path = txt_file_path.replace('.txt', '.vtt')
-                    if os.path.exists(vtt_file_path):
-                        zipf.write(vtt_file_path, os.path.basename(vtt_file_path))
-
-        # Automatically download the .zip file
-        if os.path.exists(zip_filename):
-            response = send_file(zip_filename, as_attachment=True)
-            return response
-
-        return "No valid transcription files found."
+@app.route('/jobs/<job_id>/download')
+def job_download(job_id):
+    job = get_job(job_id)
+    if job is None or job.status != 'done':
+        return jsonify({"error": "No valid transcription files found."}), 404
 
-    except Exception as e:
-        # Handle exceptions here
-        return "An error occurred during transcription: " + str(e)
+    return send_file(os.path.abspath(job.zip_path), as_attachment=True)
 
 # ...
 
@@ -161,7 +429,17 @@ def generate_descriptions():
         # Set OpenAI API key
         openai.api_key = os.getenv("OPENAI_API_KEY")
 
-        temp_directory = 'temp'
+        # Describe the transcripts of the requested job, or of the latest completed one
+        job = get_job(request.form.get('job_id', ''))
+        if job is None:
+            with jobs_lock:
+                completed_jobs = [job for job in jobs.values() if job.status == 'done']
+            job = completed_jobs[-1] if completed_jobs else None
+
+        if job is None or job.status != 'done':
+            return jsonify({"error": "No transcriptions available, please complete step 1 first."})
+
+        temp_directory = job.directory
         response_descriptions = []
 
         for filename in os.listdir(temp_directory):
@@ -212,4 +490,9 @@ def generate_descriptions():
 # ...
 
 if __name__ == '__main__':
+    # Load the model before serving requests. With the debug reloader, only the
+    # child process (WERKZEUG_RUN_MAIN) serves requests, so skip the parent.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        model_registry.get(MODEL_SIZE)
+
     app.run(debug=True)
\ No newline at end of file
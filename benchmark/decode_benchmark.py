@@ -0,0 +1,66 @@
+"""Measures the audio decoding latency with and without a forced garbage collection.
+
+The collection cost grows with the number of objects in the heap, so the benchmark
+first allocates many small objects, like a long-running process would hold.
+"""
+
+import argparse
+import gc
+import statistics
+import time
+
+from faster_whisper.audio import AudioDecoder
+
+
+def populate_heap(num_objects):
+    return [{"index": i, "values": [i]} for i in range(num_objects)]
+
+
+def run(audio_path, num_files, forced_collection):
+    latencies = []
+
+    with AudioDecoder() as decoder:
+        for _ in range(num_files):
+            start = time.perf_counter()
+            decoder.decode(audio_path)
+            if forced_collection:
+                gc.collect()
+            latencies.append(time.perf_counter() - start)
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "audio_path", nargs="?", default="tests/data/jfk.flac", help="Audio file"
+    )
+    parser.add_argument(
+        "--num_files", type=int, default=20, help="Number of decoded files"
+    )
+    parser.add_argument(
+        "--heap_objects",
+        type=int,
+        default=1000000,
+        help="Number of objects allocated before decoding",
+    )
+    args = parser.parse_args()
+
+    heap = populate_heap(args.heap_objects)
+
+    for forced_collection in (True, False):
+        latencies = run(args.audio_path, args.num_files, forced_collection)
+        print(
+            "%s forced collection: median %.1f ms, max %.1f ms per file"
+            % (
+                "With" if forced_collection else "Without",
+                statistics.median(latencies) * 1000,
+                max(latencies) * 1000,
+            )
+        )
+
+    del heap
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
-from faster_whisper.audio import decode_audio
+from faster_whisper.audio import AudioDecoder, decode_audio, stream_audio
+from faster_whisper.cache import FeatureCache, TranscriptionCache
 from faster_whisper.transcribe import WhisperModel
 from faster_whisper.utils import available_models, download_model, format_timestamp
 from faster_whisper.version import __version__
 
 __all__ = [
     "available_models",
+    "AudioDecoder",
     "decode_audio",
+    "FeatureCache",
+    "stream_audio",
+    "TranscriptionCache",
     "WhisperModel",
     "download_model",
     "format_timestamp",
@@ -6,11 +6,15 @@ system dependencies. FFmpeg does not need to be installed on the system.
 However, the API is quite low-level so we need to manipulate audio frames directly.
 """
 
+import bisect
+import contextlib
+import functools
 import gc
-import io
+import hashlib
 import itertools
+import threading
 
-from typing import BinaryIO, Union
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
 
 import av
 import numpy as np
@@ -34,42 +38,371 @@ def decode_audio(
       If `split_stereo` is enabled, the function returns a 2-tuple with the
       separated left and right channels.
     """
-    resampler = av.audio.resampler.AudioResampler(
-        format="s16",
-        layout="mono" if not split_stereo else "stereo",
-        rate=sampling_rate,
-    )
-
-    raw_buffer = io.BytesIO()
-    dtype = None
-
-    with av.open(input_file, metadata_errors="ignore") as container:
-        frames = container.decode(audio=0)
-        frames = _ignore_invalid_frames(frames)
-        frames = _group_frames(frames, 500000)
-        frames = _resample_frames(frames, resampler)
-
-        for frame in frames:
-            array = frame.to_ndarray()
-            dtype = array.dtype
-            raw_buffer.write(array)
-
-    # It appears that some objects related to the resampler are not freed
-    # unless the garbage collector is manually run.
-    del resampler
-    gc.collect()
-
-    audio = np.frombuffer(raw_buffer.getbuffer(), dtype=dtype)
-
-    # Convert s16 back to f32.
-    audio = audio.astype(np.float32) / 32768.0
-
-    if split_stereo:
-        left_channel = audio[0::2]
-        right_channel = audio[1::2]
-        return left_channel, right_channel
-
-    return audio
+    with AudioDecoder(
+        sampling_rate=sampling_rate, split_stereo=split_stereo
+    ) as decoder:
+        return decoder.decode(input_file)
+
+
+def stream_audio(
+    input_file: Union[str, BinaryIO],
+    sampling_rate: int = 16000,
+    split_stereo: bool = False,
+    chunk_seconds: float = 30,
+) -> Iterator[np.ndarray]:
+    """Decodes the audio by chunks.
+
+    Unlike decode_audio, the samples are returned while the input is being decoded
+    and the whole audio is never stored.
+
+    Args:
+      input_file: Path to the input file or a file-like object.
+      sampling_rate: Resample the audio to this sample rate.
+      split_stereo: Return separate left and right channels.
+      chunk_seconds: Duration of each chunk in seconds.
+
+    Returns:
+      A generator over float32 Numpy arrays of chunk_seconds of audio. The last chunk
+      can be shorter.
+
+      If `split_stereo` is enabled, the generator yields 2-tuples with the separated
+      left and right channels.
+    """
+    with AudioDecoder(
+        sampling_rate=sampling_rate, split_stereo=split_stereo
+    ) as decoder:
+        yield from decoder.stream(input_file, chunk_seconds=chunk_seconds)
+
+
+class AudioDecoder:
+    """Decodes audio files with the same output format.
+
+    Each file is resampled with a new FFmpeg filter graph. With older PyAV versions,
+    the filter graphs are in reference cycles and are only freed by the garbage
+    collector. Instead of running a full collection after each file, the decoder
+    runs it when it is closed, or after max_pending_graphs files. No collection is
+    run with PyAV versions which free the graphs when the resampler is deleted.
+
+    The decoder can be used as a context manager and from multiple threads.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: int = 16000,
+        split_stereo: bool = False,
+        max_pending_graphs: int = 16,
+    ):
+        """Initializes the decoder.
+
+        Args:
+          sampling_rate: Resample the audio to this sample rate.
+          split_stereo: Return separate left and right channels.
+          max_pending_graphs: Number of decoded files after which the garbage collector
+            is run, when the filter graphs are not freed otherwise.
+        """
+        self.sampling_rate = sampling_rate
+        self.split_stereo = split_stereo
+        self.max_pending_graphs = max_pending_graphs
+        self.num_channels = 2 if split_stereo else 1
+
+        self._lock = threading.Lock()
+        self._pending_graphs = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Frees the filter graphs of the decoded files."""
+        with self._lock:
+            pending_graphs = self._pending_graphs
+            self._pending_graphs = 0
+
+        if pending_graphs > 0 and _filter_graphs_have_cycles():
+            gc.collect()
+
+    def decode(self, input_file: Union[str, BinaryIO]):
+        """Decodes the audio, see decode_audio."""
+        with self._open(input_file) as (container, frames):
+            # The samples are written in a buffer allocated from the duration reported
+            # by the container, which is grown only if the duration is unknown or wrong.
+            duration = _get_duration(container)
+            if duration is not None:
+                capacity = int((duration + 1) * self.sampling_rate) * self.num_channels
+            else:
+                capacity = 30 * self.sampling_rate * self.num_channels
+
+            audio = np.empty(capacity, dtype=np.float32)
+            size = 0
+
+            for frame in frames:
+                array = frame.to_ndarray().reshape(-1)
+
+                if size + array.shape[0] > audio.shape[0]:
+                    audio = _grow_buffer(audio, size + array.shape[0])
+
+                # Convert s16 back to f32 in place.
+                samples = audio[size : size + array.shape[0]]
+                samples[:] = array
+                samples /= 32768.0
+                size += array.shape[0]
+
+        # The returned arrays are views of the buffer, so it is copied when a large
+        # part of it is unused, e.g. after it was grown.
+        if audio.shape[0] - size > audio.shape[0] // 10:
+            audio = audio[:size].copy()
+        else:
+            audio = audio[:size]
+
+        return self._split_channels(audio)
+
+    def stream(
+        self,
+        input_file: Union[str, BinaryIO],
+        chunk_seconds: float = 30,
+    ) -> Iterator[np.ndarray]:
+        """Decodes the audio by chunks, see stream_audio."""
+        chunk_size = int(chunk_seconds * self.sampling_rate) * self.num_channels
+
+        with self._open(input_file) as (_, frames):
+            chunk = np.empty(chunk_size, dtype=np.float32)
+            size = 0
+
+            for frame in frames:
+                array = frame.to_ndarray().reshape(-1)
+
+                while array.shape[0] > 0:
+                    num_samples = min(chunk_size - size, array.shape[0])
+                    # Convert s16 back to f32 in place.
+                    samples = chunk[size : size + num_samples]
+                    samples[:] = array[:num_samples]
+                    samples /= 32768.0
+                    array = array[num_samples:]
+                    size += num_samples
+
+                    if size == chunk_size:
+                        yield self._split_channels(chunk)
+                        chunk = np.empty(chunk_size, dtype=np.float32)
+                        size = 0
+
+            if size > 0:
+                yield self._split_channels(chunk[:size])
+
+    @contextlib.contextmanager
+    def _open(self, input_file):
+        resampler = av.audio.resampler.AudioResampler(
+            format="s16",
+            layout="mono" if not self.split_stereo else "stereo",
+            rate=self.sampling_rate,
+        )
+
+        try:
+            with av.open(input_file, metadata_errors="ignore") as container:
+                frames = container.decode(audio=0)
+                frames = _ignore_invalid_frames(frames)
+                frames = _group_frames(frames, 500000)
+                frames = _resample_frames(frames, resampler)
+
+                yield container, frames
+
+        finally:
+            del resampler
+
+            with self._lock:
+                self._pending_graphs += 1
+                max_pending_graphs_reached = (
+                    self._pending_graphs >= self.max_pending_graphs
+                )
+
+            if max_pending_graphs_reached:
+                self.close()
+
+    def _split_channels(self, audio):
+        if self.split_stereo:
+            return audio[0::2], audio[1::2]
+        return audio
+
+
+def get_audio_duration(input_file: Union[str, BinaryIO]) -> Optional[float]:
+    """Returns the duration of the audio in seconds, as reported by the container.
+
+    The duration is read from the metadata without decoding the audio, so it can differ
+    slightly from the duration of the decoded samples.
+
+    Args:
+      input_file: Path to the input file or a seekable file-like object.
+
+    Returns:
+      The duration in seconds, or None if the container does not report it.
+    """
+    position = None if isinstance(input_file, str) else input_file.tell()
+
+    try:
+        with av.open(input_file, metadata_errors="ignore") as container:
+            return _get_duration(container)
+    finally:
+        if position is not None:
+            input_file.seek(position)
+
+
+def hash_audio(audio: Union[str, BinaryIO, np.ndarray]) -> str:
+    """Returns the SHA-256 hash of an input file or audio waveform.
+
+    The file content is hashed as is, without decoding it.
+
+    Args:
+      audio: Path to the input file (or a file-like object), or the audio waveform.
+        A file-like object is read from its current position, which is restored
+        afterwards.
+
+    Returns:
+      The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+
+    if isinstance(audio, np.ndarray):
+        digest.update(str(audio.dtype).encode())
+        digest.update(np.ascontiguousarray(audio).data)
+    elif isinstance(audio, str):
+        with open(audio, "rb") as audio_file:
+            _update_digest(digest, audio_file)
+    else:
+        position = audio.tell()
+        try:
+            _update_digest(digest, audio)
+        finally:
+            audio.seek(position)
+
+    return digest.hexdigest()
+
+
+def _update_digest(digest, audio_file, block_size=1 << 20):
+    while True:
+        block = audio_file.read(block_size)
+        if not block:
+            break
+        digest.update(block)
+
+
+class AudioBuffer:
+    """Audio samples stored as a list of chunks.
+
+    The buffer can be filled from another thread while it is read: `wait` blocks until
+    enough samples are available. Slicing the buffer returns the samples as a single
+    array, which is a view when they are in the same chunk. The chunks can also be
+    views of another array, see `faster_whisper.vad.collect_chunk_views`.
+    """
+
+    def __init__(self, chunks: Iterable[np.ndarray] = ()):
+        self._chunks = []
+        self._offsets = [0]
+        self._condition = threading.Condition()
+        self._error = None
+        self.finished = False
+
+        for chunk in chunks:
+            self.append(chunk)
+
+    @property
+    def shape(self):
+        return (self._offsets[-1],)
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def append(self, chunk: np.ndarray) -> None:
+        with self._condition:
+            if chunk.shape[0] > 0:
+                self._chunks.append(chunk)
+                self._offsets.append(self._offsets[-1] + chunk.shape[0])
+            self._condition.notify_all()
+
+    def close(self, error: Optional[Exception] = None) -> None:
+        """Marks the end of the audio, optionally because of a decoding error."""
+        with self._condition:
+            self.finished = True
+            self._error = error
+            self._condition.notify_all()
+
+    def fill(self, chunks: Iterable[np.ndarray]) -> None:
+        """Appends all chunks and closes the buffer, e.g. from a decoding thread."""
+        try:
+            for chunk in chunks:
+                self.append(chunk)
+        except Exception as e:
+            self.close(error=e)
+        else:
+            self.close()
+
+    def wait(self, num_samples: Optional[int] = None) -> int:
+        """Waits until num_samples samples are available or the buffer is closed.
+
+        Args:
+          num_samples: Number of samples to wait for. If None, wait until the buffer is
+            closed.
+
+        Returns:
+          The number of available samples.
+
+        Raises:
+          RuntimeError: if the audio could not be decoded.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.finished
+                or (num_samples is not None and self._offsets[-1] >= num_samples)
+            )
+
+            if self._error is not None:
+                raise RuntimeError("Failed to decode the audio") from self._error
+
+            return self._offsets[-1]
+
+    def __getitem__(self, key: slice) -> np.ndarray:
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise IndexError("only contiguous slices of samples are supported")
+
+        with self._condition:
+            chunks = list(self._chunks)
+            offsets = list(self._offsets)
+
+        start, stop, _ = key.indices(offsets[-1])
+        if start >= stop:
+            return np.empty(0, dtype=chunks[0].dtype if chunks else np.float32)
+
+        first = bisect.bisect_right(offsets, start) - 1
+        last = bisect.bisect_left(offsets, stop)
+        parts = chunks[first:last]
+        parts[-1] = parts[-1][: stop - offsets[last - 1]]
+        parts[0] = parts[0][start - offsets[first] :]
+
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+@functools.lru_cache(maxsize=None)
+def _filter_graphs_have_cycles():
+    # Older PyAV versions keep a strong reference from the filter contexts to their
+    # graph, so the graphs are only freed by the garbage collector.
+    graph = av.filter.Graph()
+    context = graph.add("anull")
+    return any(referent is graph for referent in gc.get_referents(context))
+
+
+def _get_duration(container):
+    stream = container.streams.audio[0]
+    if stream.duration is not None and stream.time_base is not None:
+        return float(stream.duration * stream.time_base)
+    if container.duration is not None:
+        return container.duration / av.time_base
+    return None
+
+
+def _grow_buffer(buffer, min_size):
+    new_buffer = np.empty(max(min_size, 2 * buffer.shape[0]), dtype=buffer.dtype)
+    new_buffer[: buffer.shape[0]] = buffer
+    return new_buffer
 
 
 def _ignore_invalid_frames(frames):
@@ -0,0 +1,366 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from faster_whisper.feature_extractor import FeatureExtractor, StreamingFeatures
+from faster_whisper.transcribe import (
+    Segment,
+    TranscriptionInfo,
+    TranscriptionOptions,
+    Word,
+)
+from faster_whisper.vad import VadOptions
+
+# Incremented when the format of the cached results changes.
+_CACHE_VERSION = 3
+
+
+class _DiskCache:
+    """Files stored in a directory, with a least recently used eviction.
+
+    An entry can be made of several files with the same name and different extensions,
+    which are removed together.
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_path(self, key, extension):
+        return os.path.join(self.directory, "%s.%s" % (key, extension))
+
+    def _read_json(self, key):
+        path = self._get_path(key, "json")
+        try:
+            with open(path, encoding="utf-8") as json_file:
+                content = json.load(json_file)
+            # The modification time orders the entries for the LRU eviction.
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return content
+
+    def _write_json(self, key, content):
+        def _write(path):
+            with open(path, "w", encoding="utf-8") as json_file:
+                json.dump(content, json_file)
+
+        self._write_file(self._get_path(key, "json"), _write)
+
+    def _write_file(self, path, write):
+        # Write to a temporary file first so that readers never see a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _evict(self):
+        entries = {}
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+
+            key = entry.name.split(".", 1)[0]
+            mtime, size, paths = entries.get(key, (0, 0, []))
+            paths.append(entry.path)
+            entries[key] = (max(mtime, stat.st_mtime), size + stat.st_size, paths)
+
+        total_size = sum(size for _, size, _ in entries.values())
+
+        for _, size, paths in sorted(entries.values()):
+            if total_size <= self.max_size:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+
+
+class TranscriptionCache(_DiskCache):
+    """On-disk cache of transcription results.
+
+    Each result is stored as a JSON file with the segments and the transcription info.
+    When the total size of the files exceeds max_size, the least recently used
+    results are removed. The cache can be shared by several threads.
+    """
+
+    def __init__(self, directory: str, max_size: int = 512 * 1024 * 1024):
+        """Initializes the cache.
+
+        Args:
+          directory: Directory where the results are stored. It is created if needed.
+          max_size: Maximum total size of the stored results in bytes.
+        """
+        super().__init__(directory, max_size)
+
+    @staticmethod
+    def make_key(audio_hash: str, model_id: str, **options) -> str:
+        """Returns the cache key of a transcription.
+
+        Args:
+          audio_hash: Hash of the input, see hash_audio.
+          model_id: Identifier of the model, e.g. the model size, device and compute type.
+          options: Options that change the result, e.g. the arguments passed to
+            WhisperModel.transcribe. They can include TranscriptionOptions and VadOptions.
+
+        Returns:
+          The hexadecimal key.
+        """
+        return _make_key(audio=audio_hash, model=model_id, options=options)
+
+    def get(self, key: str) -> Optional[Tuple[List[Segment], TranscriptionInfo]]:
+        """Returns the segments and transcription info stored for the key, if any."""
+        result = self._read_json(key)
+        if result is None:
+            return None
+
+        segments = [_segment_from_json(segment) for segment in result["segments"]]
+        info = _info_from_json(result["info"])
+        return segments, info
+
+    def put(
+        self, key: str, segments: Iterable[Segment], info: TranscriptionInfo
+    ) -> None:
+        """Stores the segments and transcription info for the key."""
+        result = {
+            "segments": [_to_json(segment) for segment in segments],
+            "info": _to_json(info),
+        }
+
+        self._write_json(key, result)
+
+        with self._lock:
+            self._evict()
+
+
+class FeatureCache(_DiskCache):
+    """On-disk cache of the VAD speech chunks and log-Mel features of audio inputs.
+
+    They do not depend on the decoding options, so transcribing the same audio again
+    with other options, e.g. another beam size or temperature, then only runs the model.
+    The features are stored as .npy files which are memory-mapped when they are read.
+    When the total size of the files exceeds max_size, the least recently used entries
+    are removed. The cache can be shared by several threads.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: int = 4 * 1024 * 1024 * 1024,
+        dtype: np.dtype = np.float16,
+    ):
+        """Initializes the cache.
+
+        Args:
+          directory: Directory where the entries are stored. It is created if needed.
+          max_size: Maximum total size of the stored entries in bytes.
+          dtype: Data type of the stored features.
+        """
+        super().__init__(directory, max_size)
+        self.dtype = np.dtype(dtype)
+
+    def get_speech_chunks(
+        self, audio_hash: str, vad_options: VadOptions
+    ) -> Optional[Tuple[np.ndarray, int]]:
+        """Returns the speech chunks of the audio and its number of samples, if cached.
+
+        Args:
+          audio_hash: Hash of the input, see hash_audio.
+          vad_options: Options used to find the speech chunks.
+        """
+        entry = self._read_json(self._get_speech_chunks_key(audio_hash, vad_options))
+        if entry is None:
+            return None
+        return _speech_chunks_from_json(entry["speech_chunks"]), entry["num_samples"]
+
+    def put_speech_chunks(
+        self,
+        audio_hash: str,
+        vad_options: VadOptions,
+        speech_chunks: np.ndarray,
+        num_samples: int,
+    ) -> None:
+        """Stores the speech chunks of the audio and its number of samples."""
+        key = self._get_speech_chunks_key(audio_hash, vad_options)
+        self._write_json(
+            key, {"speech_chunks": _to_json(speech_chunks), "num_samples": num_samples}
+        )
+
+        with self._lock:
+            self._evict()
+
+    def get_features(
+        self,
+        audio_hash: str,
+        feature_extractor: FeatureExtractor,
+        vad_options: Optional[VadOptions] = None,
+    ) -> Optional[Tuple[np.ndarray, int, Optional[np.ndarray]]]:
+        """Returns the features of the audio, if cached.
+
+        Args:
+          audio_hash: Hash of the input, see hash_audio.
+          feature_extractor: Feature extractor used to compute the features.
+          vad_options: Options used to find the speech chunks, if the features are
+            computed on the speech chunks only.
+
+        Returns:
+          A tuple with the memory-mapped features as returned by StreamingFeatures.save,
+          the number of samples of the audio and the speech chunks if vad_options is set.
+        """
+        key = self._get_features_key(audio_hash, feature_extractor, vad_options)
+        entry = self._read_json(key)
+        if entry is None:
+            return None
+
+        try:
+            features = np.load(self._get_path(key, "npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        speech_chunks = entry["speech_chunks"]
+        if speech_chunks is not None:
+            speech_chunks = _speech_chunks_from_json(speech_chunks)
+
+        return features, entry["num_samples"], speech_chunks
+
+    def put_features(
+        self,
+        audio_hash: str,
+        features: StreamingFeatures,
+        num_samples: int,
+        vad_options: Optional[VadOptions] = None,
+        speech_chunks: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Stores the features of the audio.
+
+        Args:
+          audio_hash: Hash of the input, see hash_audio.
+          features: Features of the audio, or of its speech chunks when vad_options is
+            set. They are computed and written one block at a time.
+          num_samples: Number of samples of the audio.
+          vad_options: Options used to find the speech chunks.
+          speech_chunks: Speech chunks of the audio, when vad_options is set.
+
+        Returns:
+          The stored features, memory-mapped from the file.
+        """
+        key = self._get_features_key(
+            audio_hash, features.feature_extractor, vad_options
+        )
+        stored_features = None
+
+        def _write(tmp_path):
+            nonlocal stored_features
+            features.save(tmp_path, self.dtype)
+            # The file is mapped before it is visible to the eviction, which can remove
+            # it right away, e.g. when it is larger than max_size.
+            stored_features = np.load(tmp_path, mmap_mode="r")
+
+        # The metadata is written last since it marks the entry as complete.
+        self._write_file(self._get_path(key, "npy"), _write)
+        self._write_json(
+            key,
+            {
+                "num_samples": num_samples,
+                "speech_chunks": (
+                    _to_json(speech_chunks) if speech_chunks is not None else None
+                ),
+            },
+        )
+
+        with self._lock:
+            self._evict()
+
+        return stored_features
+
+    def _get_speech_chunks_key(self, audio_hash, vad_options):
+        return _make_key(
+            kind="speech_chunks", audio=audio_hash, vad_options=vad_options
+        )
+
+    def _get_features_key(self, audio_hash, feature_extractor, vad_options):
+        return _make_key(
+            kind="features",
+            audio=audio_hash,
+            vad_options=vad_options,
+            dtype=self.dtype.name,
+            feature_extractor={
+                "feature_size": feature_extractor.mel_filters.shape[0],
+                "sampling_rate": feature_extractor.sampling_rate,
+                "hop_length": feature_extractor.hop_length,
+                "chunk_length": feature_extractor.chunk_length,
+                "n_fft": feature_extractor.n_fft,
+            },
+        )
+
+
+def _make_key(**content):
+    content = json.dumps(
+        dict(_to_json(content), version=_CACHE_VERSION), sort_keys=True, default=repr
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _speech_chunks_from_json(speech_chunks):
+    return np.array(speech_chunks, dtype=np.int64).reshape(-1, 2)
+
+
+def _to_json(value):
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return {key: _to_json(item) for key, item in value._asdict().items()}
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _segment_from_json(segment):
+    words = segment["words"]
+    if words is not None:
+        words = [Word(**word) for word in words]
+    return Segment(**dict(segment, words=words))
+
+
+def _info_from_json(info):
+    all_language_probs = info["all_language_probs"]
+    if all_language_probs is not None:
+        all_language_probs = [
+            tuple(language_prob) for language_prob in all_language_probs
+        ]
+
+    vad_options = info["vad_options"]
+    if vad_options is not None:
+        vad_options = VadOptions(**vad_options)
+
+    return TranscriptionInfo(
+        **dict(
+            info,
+            all_language_probs=all_language_probs,
+            transcription_options=TranscriptionOptions(**info["transcription_options"]),
+            vad_options=vad_options,
+        )
+    )
@@ -1,5 +1,14 @@
+import collections
+import tempfile
+
+from typing import Optional, Union
+
 import numpy as np
 
+from numpy.lib.stride_tricks import sliding_window_view
+
+from faster_whisper.audio import AudioBuffer
+
 
 # Adapted from https://github.com/huggingface/transformers/blob/main/src/transformers/models/whisper/feature_extraction_whisper.py  # noqa: E501
 class FeatureExtractor:
@@ -18,6 +27,7 @@ class FeatureExtractor:
         self.nb_max_frames = self.n_samples // hop_length
         self.time_per_frame = hop_length / sampling_rate
         self.sampling_rate = sampling_rate
+        self.stft_block_size = 4096
         self.mel_filters = self.get_mel_filters(
             sampling_rate, n_fft, n_mels=feature_size
         )
@@ -79,41 +89,22 @@ class FeatureExtractor:
         between the beginning of each new frame.
         Centering is done by reflecting the waveform which is first centered around
         `frame_idx * hop_length`.
+
+        The frames are returned as a read-only strided view over the padded waveform,
+        so no copy of each frame is made.
         """
-        frames = []
-        for i in range(0, waveform.shape[0] + 1, self.hop_length):
+        num_frames = waveform.shape[0] // self.hop_length + 1
+
+        if center:
             half_window = (self.n_fft - 1) // 2 + 1
-            if center:
-                start = i - half_window if i > half_window else 0
-                end = (
-                    i + half_window
-                    if i < waveform.shape[0] - half_window
-                    else waveform.shape[0]
-                )
-
-                frame = waveform[start:end]
-
-                if start == 0:
-                    padd_width = (-i + half_window, 0)
-                    frame = np.pad(frame, pad_width=padd_width, mode="reflect")
-
-                elif end == waveform.shape[0]:
-                    padd_width = (0, (i - waveform.shape[0] + half_window))
-                    frame = np.pad(frame, pad_width=padd_width, mode="reflect")
-
-            else:
-                frame = waveform[i : i + self.n_fft]
-                frame_width = frame.shape[0]
-                if frame_width < waveform.shape[0]:
-                    frame = np.lib.pad(
-                        frame,
-                        pad_width=(0, self.n_fft - frame_width),
-                        mode="constant",
-                        constant_values=0,
-                    )
-
-            frames.append(frame)
-        return np.stack(frames, 0)
+            frame_length = 2 * half_window
+            waveform = np.pad(waveform, half_window, mode="reflect")
+        else:
+            frame_length = self.n_fft
+            waveform = np.pad(waveform, (0, self.n_fft))
+
+        frames = sliding_window_view(waveform, frame_length)[:: self.hop_length]
+        return frames[:num_frames]
 
     def stft(self, frames, window):
         """
@@ -131,15 +122,18 @@ class FeatureExtractor:
         # number of FFT bins to store
         num_fft_bins = (fft_size >> 1) + 1
 
+        if window is not None:
+            window = window.astype(np.float32, copy=False)
+
         data = np.empty((len(frames), num_fft_bins), dtype=np.complex64)
-        fft_signal = np.zeros(fft_size)
 
-        for f, frame in enumerate(frames):
+        # Transform blocks of frames at once to bound the size of the intermediate arrays.
+        for start in range(0, len(frames), self.stft_block_size):
+            block = frames[start : start + self.stft_block_size]
             if window is not None:
-                np.multiply(frame, window, out=fft_signal[:frame_size])
-            else:
-                fft_signal[:frame_size] = frame
-            data[f] = np.fft.fft(fft_signal, axis=0)[:num_fft_bins]
+                block = block * window
+            data[start : start + len(block)] = np.fft.rfft(block, n=fft_size, axis=-1)
+
         return data.T
 
     def __call__(self, waveform, padding=True):
@@ -150,17 +144,285 @@ class FeatureExtractor:
         if padding:
             waveform = np.pad(waveform, [(0, self.n_samples)])
 
+        frames = self.fram_wave(waveform)
+
+        # The last frame is not used.
+        log_spec = self.log_mel_spectrogram(frames[:-1])
+
+        return self.normalize(log_spec, log_spec.max())
+
+    def log_mel_spectrogram(self, frames):
+        """
+        Compute the log-Mel spectrogram of the given frames, before the normalization.
+        """
         window = np.hanning(self.n_fft + 1)[:-1]
 
-        frames = self.fram_wave(waveform)
         stft = self.stft(frames, window=window)
-        magnitudes = np.abs(stft[:, :-1]) ** 2
+        magnitudes = np.abs(stft) ** 2
 
         filters = self.mel_filters
         mel_spec = filters @ magnitudes
 
-        log_spec = np.log10(np.clip(mel_spec, a_min=1e-10, a_max=None))
-        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return np.log10(np.clip(mel_spec, a_min=1e-10, a_max=None))
+
+    def normalize(self, log_spec, max_value):
+        """
+        Normalize a log-Mel spectrogram given the maximum value over the whole audio.
+        """
+        log_spec = np.maximum(log_spec, max_value - 8.0)
         log_spec = (log_spec + 4.0) / 4.0
 
         return log_spec
+
+
+class StreamingFeatures:
+    """Log-Mel spectrogram of a waveform which is computed when it is sliced.
+
+    Slicing this object gives the same result as slicing the array returned by
+    FeatureExtractor.__call__, but the frames are computed by blocks of 30 seconds
+    and only the last accessed blocks are kept in memory. The maximum value used to
+    normalize the spectrogram is computed with a first pass over the audio.
+
+    This keeps the memory usage independent of the audio duration, at the cost of
+    computing the spectrogram twice. Audio of at most max_resident_blocks blocks is not
+    computed twice: the blocks of the first pass are kept in memory. With mmap=True,
+    the blocks computed in the first pass are instead written to a temporary
+    memory-mapped file and read back from it, so the spectrogram is computed once and
+    only the pages being read are resident.
+
+    The waveform can also be an AudioBuffer, e.g. the speech chunks returned by
+    collect_chunk_views which are then read without concatenating them. When the
+    AudioBuffer is still being decoded, slicing waits for the samples of the requested
+    frames, and since the maximum value over the whole audio is not known yet, the
+    spectrogram is normalized with the maximum value of the frames computed so far.
+    """
+
+    def __init__(
+        self,
+        feature_extractor: FeatureExtractor,
+        waveform: Union[np.ndarray, AudioBuffer],
+        padding: bool = True,
+        max_cached_blocks: int = 2,
+        mmap: bool = False,
+        mmap_dir: Optional[str] = None,
+        max_resident_blocks: int = 10,
+    ):
+        self.feature_extractor = feature_extractor
+        self.waveform = waveform
+        self.padding = padding
+
+        self.half_window = (feature_extractor.n_fft - 1) // 2 + 1
+        self.block_size = feature_extractor.nb_max_frames
+        self.max_cached_blocks = max_cached_blocks
+        self.ndim = 2
+        self.dtype = np.dtype(np.float32)
+
+        self._blocks = collections.OrderedDict()
+        self._mapped_log_spec = None
+        self.streaming = isinstance(waveform, AudioBuffer) and not waveform.finished
+        if self.streaming:
+            self.max_value = -np.inf
+        elif mmap:
+            self._mapped_log_spec, self.max_value = self._compute_mapped_log_spec(
+                mmap_dir
+            )
+        else:
+            num_blocks = self.num_blocks
+            keep_blocks = num_blocks <= max_resident_blocks
+            if keep_blocks:
+                self.max_cached_blocks = max(max_cached_blocks, num_blocks)
+
+            self.max_value = -np.inf
+            for index in range(num_blocks):
+                block = self._compute_block(index)
+                self.max_value = max(self.max_value, block.max())
+                if keep_blocks:
+                    self._blocks[index] = block
+
+    @property
+    def num_samples(self):
+        """Number of samples of the padded waveform.
+
+        This waits for the end of the audio if it is still being decoded.
+        """
+        if isinstance(self.waveform, AudioBuffer):
+            self.waveform.wait()
+
+        num_samples = self.waveform.shape[0]
+        if self.padding:
+            num_samples += self.feature_extractor.n_samples
+        return num_samples
+
+    @property
+    def shape(self):
+        return (
+            self.feature_extractor.mel_filters.shape[0],
+            self.num_samples // self.feature_extractor.hop_length,
+        )
+
+    @property
+    def num_blocks(self):
+        return -(-self.shape[1] // self.block_size)
+
+    def get_content_frames(self, num_frames: int) -> int:
+        """Returns the number of frames with audio content, i.e. without the padding.
+
+        If the audio is still being decoded, this waits until num_frames frames are
+        available and returns the number of frames decoded so far.
+        """
+        hop_length = self.feature_extractor.hop_length
+
+        if isinstance(self.waveform, AudioBuffer):
+            available = self.waveform.wait(num_frames * hop_length + self.half_window)
+            if not self.waveform.finished:
+                return (available - self.half_window) // hop_length
+
+        return self.shape[1] - self.feature_extractor.nb_max_frames
+
+    def save(self, path: str, dtype: np.dtype = np.float16) -> np.ndarray:
+        """Writes the spectrogram to a .npy file, one block at a time.
+
+        Args:
+          path: Path of the .npy file.
+          dtype: Data type of the stored spectrogram.
+
+        Returns:
+          The spectrogram memory-mapped from the file in read-only mode.
+        """
+        features = np.lib.format.open_memmap(
+            path, mode="w+", dtype=dtype, shape=self.shape
+        )
+
+        for index in range(self.num_blocks):
+            start = index * self.block_size
+            end = start + self.block_size
+            features[:, start:end] = self[:, start:end]
+
+        features.flush()
+        del features
+
+        return np.load(path, mmap_mode="r")
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 2:
+            raise IndexError("too many indices for the log-Mel spectrogram")
+
+        mel_key = key[0]
+        frame_key = key[1] if len(key) > 1 else slice(None)
+
+        if not isinstance(frame_key, slice) or frame_key.step not in (None, 1):
+            raise IndexError("only contiguous slices of frames are supported")
+
+        start = frame_key.start or 0
+        stop = frame_key.stop
+        if start < 0 or stop is None or stop < 0:
+            start, stop, _ = frame_key.indices(self.shape[1])
+        stop = max(start, stop)
+
+        first_block = start // self.block_size
+        last_block = -(-stop // self.block_size)
+        blocks = [self._get_block(index) for index in range(first_block, last_block)]
+
+        if blocks:
+            log_spec = np.concatenate(blocks, axis=1) if len(blocks) > 1 else blocks[0]
+        else:
+            log_spec = np.empty((self.shape[0], 0), dtype=self.dtype)
+
+        offset = first_block * self.block_size
+        log_spec = log_spec[:, start - offset : stop - offset]
+
+        return self.feature_extractor.normalize(log_spec, self.max_value)[mel_key]
+
+    def _compute_mapped_log_spec(self, mmap_dir):
+        # The temporary file is deleted when it is closed, which happens when the
+        # memory map is released.
+        with tempfile.TemporaryFile(dir=mmap_dir) as mmap_file:
+            log_spec = np.memmap(
+                mmap_file, dtype=self.dtype, mode="w+", shape=self.shape
+            )
+
+        max_value = -np.inf
+        for index in range(self.num_blocks):
+            block = self._compute_block(index)
+            start = index * self.block_size
+            log_spec[:, start : start + block.shape[1]] = block
+            max_value = max(max_value, block.max())
+
+        return log_spec, max_value
+
+    def _get_block(self, index):
+        if self._mapped_log_spec is not None:
+            start = index * self.block_size
+            return self._mapped_log_spec[:, start : start + self.block_size]
+
+        log_spec = self._blocks.get(index)
+
+        if log_spec is None:
+            log_spec = self._compute_block(index)
+            self._blocks[index] = log_spec
+            while len(self._blocks) > self.max_cached_blocks:
+                self._blocks.popitem(last=False)
+
+            if self.streaming and log_spec.size > 0:
+                self.max_value = max(self.max_value, log_spec.max())
+        else:
+            self._blocks.move_to_end(index)
+
+        return log_spec
+
+    def _compute_block(self, index):
+        hop_length = self.feature_extractor.hop_length
+        frame_length = 2 * self.half_window
+
+        start = index * self.block_size
+        end = start + self.block_size
+
+        if isinstance(self.waveform, AudioBuffer):
+            # Wait for the samples of the last frame of the block.
+            self.waveform.wait((end - 1) * hop_length + self.half_window)
+
+        if not isinstance(self.waveform, AudioBuffer) or self.waveform.finished:
+            end = min(end, self.shape[1])
+
+        if end <= start:
+            return np.empty(
+                (self.feature_extractor.mel_filters.shape[0], 0), self.dtype
+            )
+
+        samples = self._get_samples(
+            start * hop_length, (end - 1) * hop_length + frame_length
+        )
+        frames = sliding_window_view(samples, frame_length)[::hop_length]
+
+        return self.feature_extractor.log_mel_spectrogram(frames)
+
+    def _get_samples(self, start, end):
+        """Returns samples of the padded waveform, centered and reflected as in fram_wave."""
+        start -= self.half_window
+        end -= self.half_window
+        waveform_size = self.waveform.shape[0]
+
+        if start >= 0 and end <= waveform_size:
+            return self.waveform[start:end]
+
+        positions = np.abs(np.arange(start, end))
+        if end > waveform_size:
+            num_samples = self.num_samples
+            positions = np.where(
+                positions >= num_samples,
+                2 * (num_samples - 1) - positions,
+                positions,
+            )
+
+        samples = np.zeros(end - start, dtype=np.float32)
+        in_waveform = positions < waveform_size
+        if np.any(in_waveform):
+            positions = positions[in_waveform]
+            first = positions.min()
+            samples[in_waveform] = self.waveform[first : positions.max() + 1][
+                positions - first
+            ]
+
+        return samples
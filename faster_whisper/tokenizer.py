@@ -1,8 +1,9 @@
 import string
 
 from functools import cached_property
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import tokenizers
 
 
@@ -15,7 +16,20 @@ class Tokenizer:
         multilingual: bool,
         task: Optional[str] = None,
         language: Optional[str] = None,
+        token_bytes: Optional[Dict[int, bytes]] = None,
     ):
+        """Initializes the tokenizer.
+
+        Args:
+          tokenizer: The wrapped tokenizer.
+          multilingual: Whether the model is multilingual.
+          task: Task of the multilingual model (transcribe or translate).
+          language: Language code of the multilingual model.
+          token_bytes: Optional dictionary caching the bytes of each token, filled when
+            the tokens are first split into words. It can be shared by the tokenizers
+            wrapping the same tokenizers.Tokenizer, so that it is not filled again for
+            each transcription.
+        """
         self.tokenizer = tokenizer
 
         if multilingual:
@@ -39,6 +53,8 @@ class Tokenizer:
             self.language = None
             self.language_code = "en"
 
+        self._token_bytes = token_bytes if token_bytes is not None else {}
+
     @cached_property
     def transcribe(self) -> int:
         return self.tokenizer.token_to_id("<|transcribe|>")
@@ -67,7 +83,7 @@ class Tokenizer:
     def no_timestamps(self) -> int:
         return self.tokenizer.token_to_id("<|notimestamps|>")
 
-    @property
+    @cached_property
     def timestamp_begin(self) -> int:
         return self.no_timestamps + 1
 
@@ -87,16 +103,20 @@ class Tokenizer:
         return self.tokenizer.encode(text, add_special_tokens=False).ids
 
     def decode(self, tokens: List[int]) -> str:
-        text_tokens = [token for token in tokens if token < self.eot]
+        eot = self.eot
+        text_tokens = [token for token in tokens if token < eot]
         return self.tokenizer.decode(text_tokens)
 
+    def is_timestamp(self, tokens: Union[List[int], np.ndarray]) -> np.ndarray:
+        """Returns a boolean mask of the timestamp tokens."""
+        return np.asarray(tokens, dtype=np.int64) >= self.timestamp_begin
+
     def decode_with_timestamps(self, tokens: List[int]) -> str:
         outputs = [[]]
 
         for token in tokens:
             if token >= self.timestamp_begin:
-                timestamp = f"<|{(token - self.timestamp_begin) * 0.02:.2f}|>"
-                outputs.append(timestamp)
+                outputs.append(self._format_timestamp(token))
                 outputs.append([])
             else:
                 outputs[-1].append(token)
@@ -119,35 +139,84 @@ class Tokenizer:
     def split_tokens_on_unicode(
         self, tokens: List[int]
     ) -> Tuple[List[str], List[List[int]]]:
-        decoded_full = self.decode_with_timestamps(tokens)
+        # The text is decoded from the bytes of each token, so that every token is only
+        # looked up once in the tokenizer. The output is the same as when decoding the
+        # tokens with decode_with_timestamps.
+        decoded_full = self._decode_bytes_with_timestamps(tokens)
         replacement_char = "\ufffd"
 
         words = []
         word_tokens = []
         current_tokens = []
+        current_text = ""
+        current_bytes = bytearray()
         unicode_offset = 0
+        timestamp_begin = self.timestamp_begin
 
         for token in tokens:
             current_tokens.append(token)
-            decoded = self.decode_with_timestamps(current_tokens)
 
-            try:
-                replacement_char_index = decoded.index(replacement_char)
-                replacement_char_index += unicode_offset
-            except ValueError:
-                replacement_char_index = None
+            if token >= timestamp_begin:
+                current_text += current_bytes.decode("utf-8", errors="replace")
+                current_text += self._format_timestamp(token)
+                current_bytes.clear()
+                decoded = current_text
+            else:
+                current_bytes += self._get_token_bytes(token)
+                decoded = current_text + current_bytes.decode("utf-8", errors="replace")
+
+            replacement_char_index = decoded.find(replacement_char)
 
-            if replacement_char_index is None or (
-                replacement_char_index < len(decoded_full)
-                and decoded_full[replacement_char_index] == replacement_char
+            if replacement_char_index < 0 or (
+                replacement_char_index + unicode_offset < len(decoded_full)
+                and decoded_full[replacement_char_index + unicode_offset]
+                == replacement_char
             ):
                 words.append(decoded)
                 word_tokens.append(current_tokens)
                 current_tokens = []
+                current_text = ""
+                current_bytes.clear()
                 unicode_offset += len(decoded)
 
         return words, word_tokens
 
+    def _decode_bytes_with_timestamps(self, tokens: List[int]) -> str:
+        outputs = []
+        text_bytes = bytearray()
+        timestamp_begin = self.timestamp_begin
+
+        for token in tokens:
+            if token >= timestamp_begin:
+                outputs.append(text_bytes.decode("utf-8", errors="replace"))
+                outputs.append(self._format_timestamp(token))
+                text_bytes.clear()
+            else:
+                text_bytes += self._get_token_bytes(token)
+
+        outputs.append(text_bytes.decode("utf-8", errors="replace"))
+        return "".join(outputs)
+
+    def _format_timestamp(self, token: int) -> str:
+        return f"<|{(token - self.timestamp_begin) * 0.02:.2f}|>"
+
+    def _get_token_bytes(self, token: int) -> bytes:
+        token_bytes = self._token_bytes.get(token)
+
+        if token_bytes is None:
+            token_string = self.tokenizer.id_to_token(token)
+
+            if token < self.eot and token_string is not None:
+                # Text tokens are stored with the byte-level encoding of GPT-2.
+                token_bytes = bytes(_BYTE_DECODER[char] for char in token_string)
+            else:
+                # Special tokens are skipped by the tokenizer decoder.
+                token_bytes = self.tokenizer.decode([token]).encode("utf-8")
+
+            self._token_bytes[token] = token_bytes
+
+        return token_bytes
+
     def split_tokens_on_spaces(
         self, tokens: List[int]
     ) -> Tuple[List[str], List[List[int]]]:
@@ -169,6 +238,26 @@ class Tokenizer:
         return words, word_tokens
 
 
+def _bytes_to_unicode():
+    """Returns the mapping of bytes to the printable characters used by the byte-level
+    BPE vocabulary of GPT-2 and Whisper."""
+    byte_values = (
+        list(range(ord("!"), ord("~") + 1))
+        + list(range(ord("¡"), ord("¬") + 1))
+        + list(range(ord("®"), ord("ÿ") + 1))
+    )
+    characters = byte_values[:]
+    n = 0
+    for byte_value in range(256):
+        if byte_value not in byte_values:
+            byte_values.append(byte_value)
+            characters.append(256 + n)
+            n += 1
+    return dict(zip(byte_values, map(chr, characters)))
+
+
+_BYTE_DECODER = {char: byte_value for byte_value, char in _bytes_to_unicode().items()}
+
 _TASKS = (
     "transcribe",
     "translate",
@@ -1,25 +1,49 @@
+import array
+import collections.abc
+import concurrent.futures
+import inspect
 import itertools
 import logging
 import os
+import threading
 import zlib
 
-from typing import BinaryIO, Iterable, List, NamedTuple, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Callable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import ctranslate2
 import numpy as np
 import tokenizers
 
-from faster_whisper.audio import decode_audio
-from faster_whisper.feature_extractor import FeatureExtractor
+from faster_whisper.audio import (
+    AudioBuffer,
+    AudioDecoder,
+    get_audio_duration,
+    hash_audio,
+)
+from faster_whisper.feature_extractor import FeatureExtractor, StreamingFeatures
 from faster_whisper.tokenizer import _LANGUAGE_CODES, Tokenizer
 from faster_whisper.utils import download_model, format_timestamp, get_logger
 from faster_whisper.vad import (
     SpeechTimestampsMap,
     VadOptions,
-    collect_chunks,
-    get_speech_timestamps,
+    collect_chunk_views,
+    get_speech_chunks,
+    stream_speech_chunks,
 )
 
+if TYPE_CHECKING:
+    from faster_whisper.cache import FeatureCache
+
 
 class Word(NamedTuple):
     start: float
@@ -42,6 +66,214 @@ class Segment(NamedTuple):
     words: Optional[List[Word]]
 
 
+class Transcript(collections.abc.Sequence):
+    """Compact storage of the segments of a transcription.
+
+    The segment fields are stored in flat arrays: the token ids of all segments in a
+    single array('i'), and the segment and word times in float32 arrays. Segment and
+    Word tuples are only created when a segment is accessed, so a transcript takes a
+    fraction of the memory of a list of segments. Times are returned as the shortest
+    decimal value with the same single precision representation, e.g. 0.56 instead of
+    0.5600000023841858.
+
+    When a tokenizer is set, the segment text is not stored but decoded from the
+    tokens on access.
+    """
+
+    __slots__ = (
+        "_tokenizer",
+        "_ids",
+        "_seeks",
+        "_starts",
+        "_ends",
+        "_temperatures",
+        "_avg_logprobs",
+        "_compression_ratios",
+        "_no_speech_probs",
+        "_tokens",
+        "_token_offsets",
+        "_texts",
+        "_word_offsets",
+        "_word_texts",
+        "_word_lengths",
+        "_word_starts",
+        "_word_ends",
+        "_word_probabilities",
+    )
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        """Initializes an empty transcript.
+
+        Args:
+          tokenizer: Tokenizer used to decode the segment text on access. If not set,
+            the text of each segment is stored.
+        """
+        self._tokenizer = tokenizer
+        self._ids = array.array("i")
+        self._seeks = array.array("i")
+        self._starts = array.array("f")
+        self._ends = array.array("f")
+        self._temperatures = array.array("d")
+        self._avg_logprobs = array.array("d")
+        self._compression_ratios = array.array("d")
+        self._no_speech_probs = array.array("d")
+        self._tokens = array.array("i")
+        self._token_offsets = array.array("i", [0])
+        self._texts = None if tokenizer is not None else []
+
+        # The words of each segment are concatenated in a single string,
+        # or None if the segment has no word timestamps.
+        self._word_offsets = array.array("i", [0])
+        self._word_texts = []
+        self._word_lengths = array.array("i")
+        self._word_starts = array.array("f")
+        self._word_ends = array.array("f")
+        self._word_probabilities = array.array("d")
+
+    @classmethod
+    def from_segments(
+        cls, segments: Iterable[Segment], tokenizer: Optional[Tokenizer] = None
+    ) -> "Transcript":
+        """Creates a transcript with the segments, e.g. returned by transcribe."""
+        transcript = cls(tokenizer)
+        for segment in segments:
+            transcript.append(segment)
+        return transcript
+
+    def append(self, segment: Segment) -> None:
+        """Adds a segment at the end of the transcript."""
+        self._ids.append(segment.id)
+        self._seeks.append(segment.seek)
+        self._starts.append(segment.start)
+        self._ends.append(segment.end)
+        self._temperatures.append(segment.temperature)
+        self._avg_logprobs.append(segment.avg_logprob)
+        self._compression_ratios.append(segment.compression_ratio)
+        self._no_speech_probs.append(segment.no_speech_prob)
+        self._tokens.extend(segment.tokens)
+        self._token_offsets.append(len(self._tokens))
+        if self._texts is not None:
+            self._texts.append(segment.text)
+
+        words = segment.words
+        if words is None:
+            self._word_texts.append(None)
+        else:
+            self._word_texts.append("".join(word.word for word in words))
+            self._word_lengths.extend(len(word.word) for word in words)
+            self._word_starts.extend(word.start for word in words)
+            self._word_ends.extend(word.end for word in words)
+            self._word_probabilities.extend(word.probability for word in words)
+        self._word_offsets.append(len(self._word_starts))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("segment index out of range")
+
+        tokens = self._tokens[
+            self._token_offsets[index] : self._token_offsets[index + 1]
+        ].tolist()
+
+        if self._texts is None:
+            text = self._tokenizer.decode(tokens)
+        else:
+            text = self._texts[index]
+
+        return Segment(
+            id=self._ids[index],
+            seek=self._seeks[index],
+            start=_from_float32(self._starts[index]),
+            end=_from_float32(self._ends[index]),
+            text=text,
+            tokens=tokens,
+            temperature=self._temperatures[index],
+            avg_logprob=self._avg_logprobs[index],
+            compression_ratio=self._compression_ratios[index],
+            no_speech_prob=self._no_speech_probs[index],
+            words=self._get_words(index),
+        )
+
+    def _get_words(self, index: int) -> Optional[List[Word]]:
+        word_text = self._word_texts[index]
+        if word_text is None:
+            return None
+
+        words = []
+        offset = 0
+        for i in range(self._word_offsets[index], self._word_offsets[index + 1]):
+            length = self._word_lengths[i]
+            words.append(
+                Word(
+                    start=_from_float32(self._word_starts[i]),
+                    end=_from_float32(self._word_ends[i]),
+                    word=word_text[offset : offset + length],
+                    probability=self._word_probabilities[i],
+                )
+            )
+            offset += length
+
+        return words
+
+    def restore_speech_timestamps(
+        self,
+        speech_chunks: Union[List[dict], np.ndarray, SpeechTimestampsMap],
+        sampling_rate: int,
+        start: int = 0,
+    ) -> None:
+        """Restores in place the timestamps of segments transcribed after the VAD.
+
+        This is equivalent to the restore_speech_timestamps function, without creating
+        new segments.
+
+        Args:
+          speech_chunks: Speech chunks found by the VAD, or their SpeechTimestampsMap.
+          sampling_rate: Sampling rate of the audio.
+          start: Index of the first segment to restore, e.g. when segments are restored
+            as they are appended.
+        """
+        if isinstance(speech_chunks, SpeechTimestampsMap):
+            ts_map = speech_chunks
+        else:
+            ts_map = SpeechTimestampsMap(speech_chunks, sampling_rate)
+
+        for index in range(start, len(self)):
+            first_word = self._word_offsets[index]
+            end_word = self._word_offsets[index + 1]
+
+            if end_word > first_word:
+                for i in range(first_word, end_word):
+                    start = _from_float32(self._word_starts[i])
+                    end = _from_float32(self._word_ends[i])
+
+                    # Ensure the word start and end times are resolved to the same chunk.
+                    chunk_index = ts_map.get_chunk_index((start + end) / 2)
+                    self._word_starts[i] = ts_map.get_original_time(start, chunk_index)
+                    self._word_ends[i] = ts_map.get_original_time(end, chunk_index)
+
+                self._starts[index] = self._word_starts[first_word]
+                self._ends[index] = self._word_ends[end_word - 1]
+
+            else:
+                self._starts[index] = ts_map.get_original_time(
+                    _from_float32(self._starts[index])
+                )
+                self._ends[index] = ts_map.get_original_time(
+                    _from_float32(self._ends[index])
+                )
+
+
+def _from_float32(value: float) -> float:
+    return float(str(np.float32(value)))
+
+
 class TranscriptionOptions(NamedTuple):
     beam_size: int
     best_of: int
@@ -64,6 +296,9 @@ class TranscriptionOptions(NamedTuple):
     word_timestamps: bool
     prepend_punctuations: str
     append_punctuations: str
+    batch_size: int
+    speculative_fallback: int
+    alignment_batch_size: int
 
 
 class TranscriptionInfo(NamedTuple):
@@ -76,6 +311,26 @@ class TranscriptionInfo(NamedTuple):
     vad_options: VadOptions
 
 
+class WordTimings(NamedTuple):
+    word: List[str]
+    num_tokens: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    probability: np.ndarray
+
+
+class LanguageDetection(NamedTuple):
+    language: str
+    language_probability: float
+    all_language_probs: Optional[List[Tuple[str, float]]]
+    encoder_output: ctranslate2.StorageView
+    features: Union[np.ndarray, StreamingFeatures]
+    duration: float
+    duration_after_vad: float
+    speech_chunks: Optional[np.ndarray]
+    vad_options: Optional[VadOptions]
+
+
 class WhisperModel:
     def __init__(
         self,
@@ -142,7 +397,13 @@ class WhisperModel:
                 "openai/whisper-tiny" + ("" if self.model.is_multilingual else ".en")
             )
 
+        # Bytes of each token, shared by the tokenizers of all transcriptions.
+        self._token_bytes = {}
+
         self.feature_extractor = FeatureExtractor()
+        self.audio_decoder = AudioDecoder(
+            sampling_rate=self.feature_extractor.sampling_rate
+        )
         self.num_samples_per_token = self.feature_extractor.hop_length * 2
         self.frames_per_second = (
             self.feature_extractor.sampling_rate // self.feature_extractor.hop_length
@@ -161,7 +422,7 @@ class WhisperModel:
 
     def transcribe(
         self,
-        audio: Union[str, BinaryIO, np.ndarray],
+        audio: Union[str, BinaryIO, np.ndarray, LanguageDetection],
         language: Optional[str] = None,
         task: str = "transcribe",
         beam_size: int = 5,
@@ -194,11 +455,22 @@ class WhisperModel:
         append_punctuations: str = "\"'.。,，!！?？:：”)]}、",
         vad_filter: bool = False,
         vad_parameters: Optional[Union[dict, VadOptions]] = None,
+        batch_size: int = 1,
+        streaming: bool = False,
+        feature_cache: Optional["FeatureCache"] = None,
+        mmap_features: bool = False,
+        speculative_fallback: int = 0,
+        alignment_batch_size: int = 1,
     ) -> Tuple[Iterable[Segment], TranscriptionInfo]:
         """Transcribes an input file.
 
         Arguments:
           audio: Path to the input file (or a file-like object), or the audio waveform.
+            It can also be a LanguageDetection returned by detect_languages: the audio is
+            then not decoded again, the detected language is used if language is not set
+            and the first window is not encoded again. The VAD options passed to
+            detect_languages are used and the VAD, streaming and feature cache options of
+            this method are ignored.
           language: The language spoken in the audio. It should be a language code such
             as "en" or "fr". If not set, the language will be detected in the first 30 seconds
             of audio.
@@ -245,6 +517,37 @@ class WhisperModel:
             https://github.com/snakers4/silero-vad.
           vad_parameters: Dictionary of Silero VAD parameters or VadOptions class (see available
             parameters and default values in the class `VadOptions`).
+          batch_size: Number of 30-second windows encoded and decoded in a single model call.
+            Batching requires condition_on_previous_text=False since the windows are then
+            independent: the audio is split in consecutive windows instead of seeking to the
+            last predicted timestamp.
+          streaming: Decode the input file in a background thread while it is transcribed,
+            so that the first segments are returned before the whole file is decoded.
+            The features are then normalized with the maximum value of the audio decoded
+            so far, and the duration is the one reported by the container. When
+            vad_filter is enabled, the VAD also runs in a background thread and each
+            speech chunk is transcribed as soon as it is found, so duration_after_vad
+            is not known and is set to the duration.
+          feature_cache: Optional FeatureCache where the speech chunks and the features
+            of the audio are stored, so that transcribing it again, e.g. with other
+            decoding options, does not decode the audio nor run the VAD again. The
+            features are then read from the cache file and the audio is not streamed.
+          mmap_features: Write the features to a temporary memory-mapped file and read
+            the windows from it, so that they are computed once and the spectrogram of
+            long recordings is not held in memory. This option has no effect when the
+            audio is streamed.
+          speculative_fallback: Number of fallback temperatures decoded at the same time as
+            the current one, so that a window failing the thresholds does not wait for the
+            next decodings one after the other. The first result passing the thresholds is
+            still selected in temperature order. The decodings run concurrently on the
+            model workers, so this option requires num_workers > 1 (see the constructor).
+            The speculative decodings that are not needed still use the workers.
+          alignment_batch_size: When word_timestamps is True, number of windows whose
+            words are aligned in a single model call. With values larger than 1, the
+            segments of the windows are returned once the whole batch is aligned, and
+            each window starts at the last decoded timestamp of the previous one instead
+            of the end of its last word. This option has no effect with batched decoding,
+            where the windows of each batch are already aligned together.
 
         Returns:
           A tuple with:
@@ -252,57 +555,132 @@ class WhisperModel:
             - a generator over transcribed segments
             - an instance of TranscriptionInfo
         """
-        sampling_rate = self.feature_extractor.sampling_rate
-
-        if not isinstance(audio, np.ndarray):
-            audio = decode_audio(audio, sampling_rate=sampling_rate)
-
-        duration = audio.shape[0] / sampling_rate
-        duration_after_vad = duration
-
-        self.logger.info(
-            "Processing audio with duration %s", format_timestamp(duration)
+        segments, info, speech_chunks = self._transcribe(
+            audio,
+            language=language,
+            task=task,
+            beam_size=beam_size,
+            best_of=best_of,
+            patience=patience,
+            length_penalty=length_penalty,
+            repetition_penalty=repetition_penalty,
+            no_repeat_ngram_size=no_repeat_ngram_size,
+            temperature=temperature,
+            compression_ratio_threshold=compression_ratio_threshold,
+            log_prob_threshold=log_prob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            condition_on_previous_text=condition_on_previous_text,
+            prompt_reset_on_temperature=prompt_reset_on_temperature,
+            initial_prompt=initial_prompt,
+            prefix=prefix,
+            suppress_blank=suppress_blank,
+            suppress_tokens=suppress_tokens,
+            without_timestamps=without_timestamps,
+            max_initial_timestamp=max_initial_timestamp,
+            word_timestamps=word_timestamps,
+            prepend_punctuations=prepend_punctuations,
+            append_punctuations=append_punctuations,
+            vad_filter=vad_filter,
+            vad_parameters=vad_parameters,
+            batch_size=batch_size,
+            streaming=streaming,
+            feature_cache=feature_cache,
+            mmap_features=mmap_features,
+            speculative_fallback=speculative_fallback,
+            alignment_batch_size=alignment_batch_size,
         )
 
-        if vad_filter:
-            if vad_parameters is None:
-                vad_parameters = VadOptions()
-            elif isinstance(vad_parameters, dict):
-                vad_parameters = VadOptions(**vad_parameters)
-            speech_chunks = get_speech_timestamps(audio, vad_parameters)
-            audio = collect_chunks(audio, speech_chunks)
-            duration_after_vad = audio.shape[0] / sampling_rate
-
-            self.logger.info(
-                "VAD filter removed %s of audio",
-                format_timestamp(duration - duration_after_vad),
+        if speech_chunks is not None:
+            segments = restore_speech_timestamps(
+                segments, speech_chunks, self.feature_extractor.sampling_rate
             )
 
-            if self.logger.isEnabledFor(logging.DEBUG):
-                self.logger.debug(
-                    "VAD filter kept the following audio segments: %s",
-                    ", ".join(
-                        "[%s -> %s]"
-                        % (
-                            format_timestamp(chunk["start"] / sampling_rate),
-                            format_timestamp(chunk["end"] / sampling_rate),
-                        )
-                        for chunk in speech_chunks
-                    ),
-                )
+        return segments, info
+
+    def _transcribe(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray, LanguageDetection],
+        language: Optional[str],
+        task: str,
+        beam_size: int,
+        best_of: int,
+        patience: float,
+        length_penalty: float,
+        repetition_penalty: float,
+        no_repeat_ngram_size: int,
+        temperature: Union[float, List[float], Tuple[float, ...]],
+        compression_ratio_threshold: Optional[float],
+        log_prob_threshold: Optional[float],
+        no_speech_threshold: Optional[float],
+        condition_on_previous_text: bool,
+        prompt_reset_on_temperature: float,
+        initial_prompt: Optional[Union[str, Iterable[int]]],
+        prefix: Optional[str],
+        suppress_blank: bool,
+        suppress_tokens: Optional[List[int]],
+        without_timestamps: bool,
+        max_initial_timestamp: float,
+        word_timestamps: bool,
+        prepend_punctuations: str,
+        append_punctuations: str,
+        vad_filter: bool,
+        vad_parameters: Optional[Union[dict, VadOptions]],
+        batch_size: int,
+        streaming: bool,
+        feature_cache: Optional["FeatureCache"],
+        mmap_features: bool,
+        speculative_fallback: int,
+        alignment_batch_size: int,
+    ) -> Tuple[
+        Iterable[Segment],
+        TranscriptionInfo,
+        Optional[Union[np.ndarray, SpeechTimestampsMap]],
+    ]:
+        """Same as transcribe, but the timestamps of the segments are not restored when
+        the VAD is enabled. The speech chunks are returned instead, or None if the
+        timestamps do not need to be restored."""
+        if isinstance(audio, LanguageDetection):
+            detection = audio
+            features = detection.features
+            duration = detection.duration
+            duration_after_vad = detection.duration_after_vad
+            speech_chunks = detection.speech_chunks
+            vad_parameters = detection.vad_options
 
         else:
-            speech_chunks = None
+            detection = None
+
+            if vad_filter:
+                vad_parameters = _get_vad_options(vad_parameters)
 
-        features = self.feature_extractor(audio)
+            (
+                features,
+                duration,
+                duration_after_vad,
+                speech_chunks,
+            ) = self._get_features(
+                audio,
+                vad_parameters if vad_filter else None,
+                streaming,
+                feature_cache,
+                mmap_features,
+            )
 
         encoder_output = None
         all_language_probs = None
 
+        if detection is not None:
+            # The first window was already encoded by detect_languages.
+            encoder_output = detection.encoder_output
+
         if language is None:
             if not self.model.is_multilingual:
                 language = "en"
                 language_probability = 1
+            elif detection is not None:
+                language = detection.language
+                language_probability = detection.language_probability
+                all_language_probs = detection.all_language_probs
             else:
                 segment = features[:, : self.feature_extractor.nb_max_frames]
                 encoder_output = self.encode(segment)
@@ -334,6 +712,7 @@ class WhisperModel:
             self.model.is_multilingual,
             task=task,
             language=language,
+            token_bytes=self._token_bytes,
         )
 
         options = TranscriptionOptions(
@@ -360,12 +739,30 @@ class WhisperModel:
             word_timestamps=word_timestamps,
             prepend_punctuations=prepend_punctuations,
             append_punctuations=append_punctuations,
+            batch_size=batch_size,
+            speculative_fallback=speculative_fallback,
+            alignment_batch_size=alignment_batch_size,
         )
 
+        if batch_size > 1 and condition_on_previous_text:
+            self.logger.warning(
+                "Batched decoding requires condition_on_previous_text=False; "
+                "the windows will be decoded one at a time"
+            )
+
+        if speculative_fallback > 0 and self.model.num_workers < 2:
+            self.logger.warning(
+                "Speculative fallback requires num_workers > 1; "
+                "the temperatures will be decoded one at a time"
+            )
+
         segments = self.generate_segments(features, tokenizer, options, encoder_output)
 
-        if speech_chunks:
-            segments = restore_speech_timestamps(segments, speech_chunks, sampling_rate)
+        if not isinstance(speech_chunks, SpeechTimestampsMap) and (
+            speech_chunks is None or speech_chunks.shape[0] == 0
+        ):
+            # The timestamps do not need to be restored.
+            speech_chunks = None
 
         info = TranscriptionInfo(
             language=language,
@@ -377,31 +774,384 @@ class WhisperModel:
             all_language_probs=all_language_probs,
         )
 
-        return segments, info
+        return segments, info, speech_chunks
+
+    def detect_languages(
+        self,
+        audios: Iterable[Union[str, BinaryIO, np.ndarray]],
+        batch_size: int = 8,
+        vad_filter: bool = False,
+        vad_parameters: Optional[Union[dict, VadOptions]] = None,
+        feature_cache: Optional["FeatureCache"] = None,
+        mmap_features: bool = False,
+    ) -> List[LanguageDetection]:
+        """Detects the language spoken in the first 30 seconds of multiple input files.
+
+        The first windows of the files are encoded and the languages are detected in
+        batches of batch_size files, with a single model call per batch. The returned
+        detections can then be passed to transcribe instead of the audio, so that the
+        files are not decoded again and the first window is not encoded again.
+
+        Note that each detection holds the features of the file until it is transcribed,
+        which can use a lot of memory for many long files (see mmap_features).
+
+        Arguments:
+          audios: Paths to the input files (or file-like objects), or audio waveforms.
+          batch_size: Number of files encoded in a single model call.
+          vad_filter: Enable the voice activity detection (VAD) to filter out parts of the
+            audio without speech, see transcribe.
+          vad_parameters: Dictionary of Silero VAD parameters or VadOptions class.
+          feature_cache: Optional FeatureCache, see transcribe.
+          mmap_features: Write the features to temporary memory-mapped files,
+            see transcribe.
+
+        Returns:
+          A list of LanguageDetection, in the order of the audios. For English-only
+          models, the language is always "en".
+        """
+        vad_options = _get_vad_options(vad_parameters) if vad_filter else None
+        nb_max_frames = self.feature_extractor.nb_max_frames
+
+        detections = []
+        audios = iter(audios)
+
+        while True:
+            batch = [
+                self._get_features(
+                    audio, vad_options, False, feature_cache, mmap_features
+                )
+                for audio in itertools.islice(audios, batch_size)
+            ]
+            if not batch:
+                break
+
+            # The batched encoder output can not be sliced, so it is moved to the CPU
+            # and each file gets its own copy.
+            batch_features = np.stack(
+                [features[:, :nb_max_frames] for features, _, _, _ in batch]
+            ).astype(np.float32, copy=False)
+            encoder_output = self.model.encode(
+                get_ctranslate2_storage(batch_features), to_cpu=True
+            )
+
+            if self.model.is_multilingual:
+                # results is a list of list[tuple[str, float]] with language names and
+                # probabilities for each file.
+                results = self.model.detect_language(encoder_output)
+            encoder_output = np.array(encoder_output)
+
+            for i, (features, duration, duration_after_vad, speech_chunks) in enumerate(
+                batch
+            ):
+                if self.model.is_multilingual:
+                    all_language_probs = [
+                        (token[2:-2], prob) for (token, prob) in results[i]
+                    ]
+                    language, language_probability = all_language_probs[0]
+                else:
+                    all_language_probs = None
+                    language, language_probability = "en", 1
+
+                detections.append(
+                    LanguageDetection(
+                        language=language,
+                        language_probability=language_probability,
+                        all_language_probs=all_language_probs,
+                        encoder_output=get_ctranslate2_storage(
+                            encoder_output[i : i + 1]
+                        ),
+                        features=features,
+                        duration=duration,
+                        duration_after_vad=duration_after_vad,
+                        speech_chunks=speech_chunks,
+                        vad_options=vad_options,
+                    )
+                )
+
+        return detections
+
+    def _get_features(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        vad_parameters: Optional[VadOptions],
+        streaming: bool,
+        feature_cache: Optional["FeatureCache"] = None,
+        mmap_features: bool = False,
+    ) -> Tuple[
+        Union[np.ndarray, StreamingFeatures],
+        float,
+        float,
+        Optional[Union[np.ndarray, SpeechTimestampsMap]],
+    ]:
+        """Returns the features of the audio from the feature cache if it is set and
+        contains them, or computes them with _compute_features."""
+        sampling_rate = self.feature_extractor.sampling_rate
+
+        audio_hash = None
+        cached_features = None
+
+        if feature_cache is not None:
+            # The features are cached for the whole audio, so it is not streamed.
+            streaming = False
+            audio_hash = hash_audio(audio)
+            cached_features = feature_cache.get_features(
+                audio_hash, self.feature_extractor, vad_parameters
+            )
+
+        if cached_features is None:
+            return self._compute_features(
+                audio,
+                vad_parameters,
+                streaming,
+                feature_cache,
+                audio_hash,
+                mmap_features,
+            )
+
+        features, num_samples, speech_chunks = cached_features
+        duration = num_samples / sampling_rate
+        duration_after_vad = duration
+        if speech_chunks is not None:
+            speech_samples = np.sum(speech_chunks[:, 1] - speech_chunks[:, 0])
+            duration_after_vad = speech_samples / sampling_rate
+
+        self.logger.info(
+            "Processing audio with duration %s (cached features)",
+            format_timestamp(duration),
+        )
+
+        return features, duration, duration_after_vad, speech_chunks
+
+    def _compute_features(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        vad_parameters: Optional[VadOptions],
+        streaming: bool,
+        feature_cache: Optional["FeatureCache"] = None,
+        audio_hash: Optional[str] = None,
+        mmap_features: bool = False,
+    ) -> Tuple[
+        Union[np.ndarray, StreamingFeatures],
+        float,
+        float,
+        Optional[Union[np.ndarray, SpeechTimestampsMap]],
+    ]:
+        """Decodes the audio, applies the VAD filter if vad_parameters is set and returns
+        the features with the audio duration before and after the VAD filter and the
+        speech chunks."""
+        sampling_rate = self.feature_extractor.sampling_rate
+
+        if isinstance(audio, np.ndarray):
+            duration = audio.shape[0] / sampling_rate
+        elif streaming:
+            duration = get_audio_duration(audio) or 0.0
+            audio_buffer = AudioBuffer()
+            decoding_thread = threading.Thread(
+                target=audio_buffer.fill,
+                args=(self.audio_decoder.stream(audio),),
+                daemon=True,
+            )
+            decoding_thread.start()
+            audio = audio_buffer
+        else:
+            audio = self.audio_decoder.decode(audio)
+            duration = audio.shape[0] / sampling_rate
+
+        duration_after_vad = duration
+
+        self.logger.info(
+            "Processing audio with duration %s", format_timestamp(duration)
+        )
+
+        if vad_parameters is not None and streaming:
+            # The timestamps map is completed by the VAD thread before the audio of
+            # each speech chunk is added to the buffer.
+            speech_chunks = SpeechTimestampsMap([], sampling_rate)
+            speech_audio = AudioBuffer()
+            vad_thread = threading.Thread(
+                target=speech_audio.fill,
+                args=(collect_streamed_chunks(audio, vad_parameters, speech_chunks),),
+                daemon=True,
+            )
+            vad_thread.start()
+            audio = speech_audio
+
+        elif vad_parameters is not None:
+            cached_speech_chunks = None
+            if feature_cache is not None:
+                cached_speech_chunks = feature_cache.get_speech_chunks(
+                    audio_hash, vad_parameters
+                )
+
+            if cached_speech_chunks is not None:
+                speech_chunks = cached_speech_chunks[0]
+            else:
+                speech_chunks = get_speech_chunks(audio, vad_parameters)
+                if feature_cache is not None:
+                    feature_cache.put_speech_chunks(
+                        audio_hash, vad_parameters, speech_chunks, audio.shape[0]
+                    )
+
+            # The speech chunks are read as views of the audio to avoid a copy.
+            audio = collect_chunk_views(audio, speech_chunks)
+            duration_after_vad = audio.shape[0] / sampling_rate
+
+            self.logger.info(
+                "VAD filter removed %s of audio",
+                format_timestamp(duration - duration_after_vad),
+            )
+
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "VAD filter kept the following audio segments: %s",
+                    ", ".join(
+                        "[%s -> %s]"
+                        % (
+                            format_timestamp(start / sampling_rate),
+                            format_timestamp(end / sampling_rate),
+                        )
+                        for start, end in speech_chunks.tolist()
+                    ),
+                )
+
+        else:
+            speech_chunks = None
+
+        # The features are computed when each window is read by generate_segments
+        # so that the memory usage does not grow with the audio duration.
+        features = StreamingFeatures(self.feature_extractor, audio, mmap=mmap_features)
+
+        if feature_cache is not None:
+            features = feature_cache.put_features(
+                audio_hash,
+                features,
+                round(duration * sampling_rate),
+                vad_parameters,
+                speech_chunks,
+            )
+
+        return features, duration, duration_after_vad, speech_chunks
+
+    def transcribe_many(
+        self,
+        audios: Iterable[Union[str, BinaryIO, np.ndarray]],
+        max_concurrency: Optional[int] = None,
+        segment_callback: Optional[
+            Callable[[int, Segment, TranscriptionInfo], None]
+        ] = None,
+        **kwargs,
+    ) -> Iterable[Tuple[int, Transcript, TranscriptionInfo]]:
+        """Transcribes multiple input files concurrently.
+
+        Each file is decoded, transcribed and fully consumed in a separate Python thread,
+        so the audio decoding and feature extraction of a file overlap with the model
+        execution of the others. The model runs up to `num_workers` transcriptions in
+        parallel (see the constructor).
+
+        Arguments:
+          audios: Paths to the input files (or file-like objects), or audio waveforms.
+          max_concurrency: Maximum number of files processed at the same time.
+            Defaults to the number of model workers.
+          segment_callback: Optional function called from the worker thread with the
+            file index, the segment and the transcription info for each transcribed segment,
+            e.g. to report the progress.
+          kwargs: Transcription options passed to `transcribe`.
+
+        Returns:
+          A generator over (index, segments, info) tuples, in completion order. `index` is
+          the position of the file in `audios` and `segments` is a Transcript, which holds
+          the segments in a compact form. An exception raised while processing a file is
+          raised when its result is reached.
+        """
+        audios = list(audios)
+        if not audios:
+            return
+
+        if max_concurrency is None:
+            max_concurrency = self.model.num_workers
+
+        # The task and language do not change how the segment text is decoded.
+        tokenizer = Tokenizer(
+            self.hf_tokenizer,
+            self.model.is_multilingual,
+            task="transcribe",
+            language="en",
+            token_bytes=self._token_bytes,
+        )
+
+        sampling_rate = self.feature_extractor.sampling_rate
+
+        def _transcribe_file(index):
+            arguments = inspect.signature(self.transcribe).bind(audios[index], **kwargs)
+            arguments.apply_defaults()
+            segments, info, speech_chunks = self._transcribe(
+                *arguments.args, **arguments.kwargs
+            )
+
+            # The timestamps are restored in the transcript arrays, without creating
+            # new segments.
+            if speech_chunks is not None and not isinstance(
+                speech_chunks, SpeechTimestampsMap
+            ):
+                speech_chunks = SpeechTimestampsMap(speech_chunks, sampling_rate)
+
+            transcript = Transcript(tokenizer)
+            for segment in segments:
+                transcript.append(segment)
+                if speech_chunks is not None:
+                    transcript.restore_speech_timestamps(
+                        speech_chunks, sampling_rate, start=len(transcript) - 1
+                    )
+                if segment_callback is not None:
+                    segment_callback(index, transcript[-1], info)
+            return index, transcript, info
+
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(max_concurrency, len(audios)))
+        )
+        futures = [executor.submit(_transcribe_file, i) for i in range(len(audios))]
+
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+        finally:
+            # Do not start the remaining files if the generator is closed early.
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def generate_segments(
         self,
-        features: np.ndarray,
+        features: Union[np.ndarray, StreamingFeatures],
         tokenizer: Tokenizer,
         options: TranscriptionOptions,
         encoder_output: Optional[ctranslate2.StorageView] = None,
     ) -> Iterable[Segment]:
-        content_frames = features.shape[-1] - self.feature_extractor.nb_max_frames
+        if options.batch_size > 1 and not options.condition_on_previous_text:
+            yield from self.generate_segments_batched(features, tokenizer, options)
+            return
+
         idx = 0
         seek = 0
-        all_tokens = []
+        all_tokens = self.get_initial_prompt_tokens(tokenizer, options)
         prompt_reset_since = 0
 
-        if options.initial_prompt is not None:
-            if isinstance(options.initial_prompt, str):
-                initial_prompt = " " + options.initial_prompt.strip()
-                initial_prompt_tokens = tokenizer.encode(initial_prompt)
-                all_tokens.extend(initial_prompt_tokens)
-            else:
-                all_tokens.extend(options.initial_prompt)
+        # The windows are aligned in batches, so their encoder outputs are kept on
+        # the CPU where they can be concatenated.
+        deferred_alignment = (
+            options.word_timestamps and options.alignment_batch_size > 1
+        )
+        pending_windows = []
+        pending_encoder_outputs = []
 
         last_speech_timestamp = 0.0
-        while seek < content_frames:
+        while True:
+            content_frames = self.get_content_frames(
+                features, seek + self.feature_extractor.nb_max_frames
+            )
+            if seek >= content_frames:
+                break
+
             time_offset = seek * self.feature_extractor.time_per_frame
             segment = features[:, seek : seek + self.feature_extractor.nb_max_frames]
             segment_size = min(
@@ -422,8 +1172,12 @@ class WhisperModel:
                 prefix=options.prefix if seek == 0 else None,
             )
 
-            if seek > 0 or encoder_output is None:
-                encoder_output = self.encode(segment)
+            if (
+                seek > 0
+                or encoder_output is None
+                or (deferred_alignment and encoder_output.device != "cpu")
+            ):
+                encoder_output = self.encode(segment, to_cpu=deferred_alignment)
 
             (
                 result,
@@ -432,46 +1186,22 @@ class WhisperModel:
                 compression_ratio,
             ) = self.generate_with_fallback(encoder_output, prompt, tokenizer, options)
 
-            if options.no_speech_threshold is not None:
-                # no voice activity check
-                should_skip = result.no_speech_prob > options.no_speech_threshold
-
-                if (
-                    options.log_prob_threshold is not None
-                    and avg_logprob > options.log_prob_threshold
-                ):
-                    # don't skip if the logprob is high enough, despite the no_speech_prob
-                    should_skip = False
-
-                if should_skip:
-                    self.logger.debug(
-                        "No speech threshold is met (%f > %f)",
-                        result.no_speech_prob,
-                        options.no_speech_threshold,
-                    )
-
-                    # fast-forward to the next segment boundary
-                    seek += segment_size
-                    continue
+            if self.is_no_speech(result, avg_logprob, options):
+                # fast-forward to the next segment boundary
+                seek += segment_size
+                continue
 
             tokens = result.sequences_ids[0]
+            is_timestamp = tokenizer.is_timestamp(tokens)
 
             previous_seek = seek
             current_segments = []
 
-            single_timestamp_ending = (
-                len(tokens) >= 2
-                and tokens[-2] < tokenizer.timestamp_begin
-                and tokens[-1] >= tokenizer.timestamp_begin
+            single_timestamp_ending = bool(
+                len(tokens) >= 2 and not is_timestamp[-2] and is_timestamp[-1]
             )
 
-            consecutive_timestamps = [
-                i
-                for i in range(len(tokens))
-                if i > 0
-                and tokens[i] >= tokenizer.timestamp_begin
-                and tokens[i - 1] >= tokenizer.timestamp_begin
-            ]
+            consecutive_timestamps = get_consecutive_timestamps(is_timestamp)
 
             if len(consecutive_timestamps) > 0:
                 slices = list(consecutive_timestamps)
@@ -516,11 +1246,12 @@ class WhisperModel:
 
             else:
                 duration = segment_duration
-                timestamps = [
-                    token for token in tokens if token >= tokenizer.timestamp_begin
-                ]
-                if len(timestamps) > 0 and timestamps[-1] != tokenizer.timestamp_begin:
-                    last_timestamp_position = timestamps[-1] - tokenizer.timestamp_begin
+                last_timestamp = get_last_timestamp(tokens, is_timestamp)
+                if (
+                    last_timestamp is not None
+                    and last_timestamp != tokenizer.timestamp_begin
+                ):
+                    last_timestamp_position = last_timestamp - tokenizer.timestamp_begin
                     duration = last_timestamp_position * self.time_precision
 
                 current_segments.append(
@@ -534,57 +1265,67 @@ class WhisperModel:
 
                 seek += segment_size
 
-            if options.word_timestamps:
-                self.add_word_timestamps(
-                    current_segments,
-                    tokenizer,
-                    encoder_output,
-                    segment_size,
-                    options.prepend_punctuations,
-                    options.append_punctuations,
-                    last_speech_timestamp=last_speech_timestamp,
-                )
+            decode_result = (result, avg_logprob, temperature, compression_ratio)
 
-                word_end_timestamps = [
-                    w["end"] for s in current_segments for w in s["words"]
-                ]
-                if len(word_end_timestamps) > 0:
-                    last_speech_timestamp = word_end_timestamps[-1]
-                if not single_timestamp_ending and len(word_end_timestamps) > 0:
-                    seek_shift = round(
-                        (word_end_timestamps[-1] - time_offset) * self.frames_per_second
+            if deferred_alignment:
+                # The segments are returned once the words are aligned, but the text
+                # is already used as prompt for the next windows.
+                for segment in current_segments:
+                    if (
+                        segment["start"] != segment["end"]
+                        and tokenizer.decode(segment["tokens"]).strip()
+                    ):
+                        all_tokens.extend(segment["tokens"])
+
+                pending_windows.append(
+                    (current_segments, seek, segment_size, decode_result)
+                )
+                pending_encoder_outputs.append(np.asarray(encoder_output))
+
+                if len(pending_windows) >= options.alignment_batch_size:
+                    segments, last_speech_timestamp = self.align_pending_windows(
+                        tokenizer,
+                        pending_windows,
+                        pending_encoder_outputs,
+                        options,
+                        idx,
+                        last_speech_timestamp,
                     )
+                    pending_windows = []
+                    pending_encoder_outputs = []
 
-                    if seek_shift > 0:
-                        seek = previous_seek + seek_shift
+                    idx += len(segments)
+                    yield from segments
 
-            for segment in current_segments:
-                tokens = segment["tokens"]
-                text = tokenizer.decode(tokens)
+            else:
+                if options.word_timestamps:
+                    self.add_word_timestamps(
+                        current_segments,
+                        tokenizer,
+                        encoder_output,
+                        segment_size,
+                        options.prepend_punctuations,
+                        options.append_punctuations,
+                        last_speech_timestamp=last_speech_timestamp,
+                    )
 
-                if segment["start"] == segment["end"] or not text.strip():
-                    continue
+                    last_word_end = get_last_word_end(current_segments)
+                    if last_word_end is not None:
+                        last_speech_timestamp = last_word_end
+                    if not single_timestamp_ending and last_word_end is not None:
+                        seek_shift = round(
+                            (last_word_end - time_offset) * self.frames_per_second
+                        )
 
-                all_tokens.extend(tokens)
-                idx += 1
+                        if seek_shift > 0:
+                            seek = previous_seek + seek_shift
 
-                yield Segment(
-                    id=idx,
-                    seek=seek,
-                    start=segment["start"],
-                    end=segment["end"],
-                    text=text,
-                    tokens=tokens,
-                    temperature=temperature,
-                    avg_logprob=avg_logprob,
-                    compression_ratio=compression_ratio,
-                    no_speech_prob=result.no_speech_prob,
-                    words=(
-                        [Word(**word) for word in segment["words"]]
-                        if options.word_timestamps
-                        else None
-                    ),
-                )
+                for segment in self.make_segments(
+                    tokenizer, current_segments, seek, decode_result, options, idx
+                ):
+                    all_tokens.extend(segment.tokens)
+                    idx += 1
+                    yield segment
 
             if (
                 not options.condition_on_previous_text
@@ -599,111 +1340,405 @@ class WhisperModel:
 
                 prompt_reset_since = len(all_tokens)
 
-    def encode(self, features: np.ndarray) -> ctranslate2.StorageView:
-        # When the model is running on multiple GPUs, the encoder output should be moved
-        # to the CPU since we don't know which GPU will handle the next job.
-        to_cpu = self.model.device == "cuda" and len(self.model.device_index) > 1
+        if pending_windows:
+            segments, _ = self.align_pending_windows(
+                tokenizer,
+                pending_windows,
+                pending_encoder_outputs,
+                options,
+                idx,
+                last_speech_timestamp,
+            )
+            yield from segments
 
-        features = np.expand_dims(features, 0)
-        features = get_ctranslate2_storage(features)
+    def align_pending_windows(
+        self,
+        tokenizer: Tokenizer,
+        windows: List[tuple],
+        encoder_outputs: List[np.ndarray],
+        options: TranscriptionOptions,
+        idx: int,
+        last_speech_timestamp: float,
+    ) -> Tuple[List[Segment], float]:
+        """Aligns the words of windows decoded by generate_segments in a single model
+        call, and returns their segments with the end of the last word."""
+        encoder_output = get_ctranslate2_storage(np.concatenate(encoder_outputs))
+        windows_segments = [current_segments for current_segments, _, _, _ in windows]
+        segment_sizes = [segment_size for _, _, segment_size, _ in windows]
+
+        last_speech_timestamp = self.align_windows(
+            tokenizer,
+            windows_segments,
+            encoder_output,
+            segment_sizes,
+            options,
+            last_speech_timestamp,
+        )
 
-        return self.model.encode(features, to_cpu=to_cpu)
+        segments = []
+        for current_segments, seek, _, decode_result in windows:
+            segments.extend(
+                self.make_segments(
+                    tokenizer,
+                    current_segments,
+                    seek,
+                    decode_result,
+                    options,
+                    idx + len(segments),
+                )
+            )
 
-    def generate_with_fallback(
+        return segments, last_speech_timestamp
+
+    def align_windows(
         self,
-        encoder_output: ctranslate2.StorageView,
-        prompt: List[int],
         tokenizer: Tokenizer,
+        windows_segments: List[List[dict]],
+        encoder_output: ctranslate2.StorageView,
+        segment_sizes: List[int],
         options: TranscriptionOptions,
-    ) -> Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float]:
-        decode_result = None
-        all_results = []
-        below_cr_threshold_results = []
-
-        max_initial_timestamp_index = int(
-            round(options.max_initial_timestamp / self.time_precision)
+        last_speech_timestamp: float,
+    ) -> float:
+        """Adds the word timestamps to the segments of several windows, which are
+        aligned with a single model call, and returns the end of the last word."""
+        text_tokens = [
+            [
+                token
+                for segment in current_segments
+                for token in segment["tokens"]
+                if token < tokenizer.eot
+            ]
+            for current_segments in windows_segments
+        ]
+        alignments = self.find_alignments(
+            tokenizer, text_tokens, encoder_output, segment_sizes
         )
 
-        for temperature in options.temperatures:
-            if temperature > 0:
-                kwargs = {
-                    "beam_size": 1,
-                    "num_hypotheses": options.best_of,
-                    "sampling_topk": 0,
-                    "sampling_temperature": temperature,
-                }
-            else:
-                kwargs = {
-                    "beam_size": options.beam_size,
-                    "patience": options.patience,
-                }
-
-            result = self.model.generate(
+        for current_segments, segment_size, alignment in zip(
+            windows_segments, segment_sizes, alignments
+        ):
+            self.add_word_timestamps(
+                current_segments,
+                tokenizer,
                 encoder_output,
-                [prompt],
-                length_penalty=options.length_penalty,
-                repetition_penalty=options.repetition_penalty,
-                no_repeat_ngram_size=options.no_repeat_ngram_size,
-                max_length=self.max_length,
-                return_scores=True,
-                return_no_speech_prob=True,
-                suppress_blank=options.suppress_blank,
-                suppress_tokens=options.suppress_tokens,
-                max_initial_timestamp_index=max_initial_timestamp_index,
-                **kwargs,
-            )[0]
+                segment_size,
+                options.prepend_punctuations,
+                options.append_punctuations,
+                last_speech_timestamp=last_speech_timestamp,
+                alignment=alignment,
+            )
 
-            tokens = result.sequences_ids[0]
+            last_word_end = get_last_word_end(current_segments)
+            if last_word_end is not None:
+                last_speech_timestamp = last_word_end
+
+        return last_speech_timestamp
+
+    def make_segments(
+        self,
+        tokenizer: Tokenizer,
+        current_segments: List[dict],
+        seek: int,
+        decode_result: Tuple[
+            ctranslate2.models.WhisperGenerationResult, float, float, float
+        ],
+        options: TranscriptionOptions,
+        idx: int,
+    ) -> List[Segment]:
+        """Returns the segments of a window which contain some text, numbered after idx."""
+        result, avg_logprob, temperature, compression_ratio = decode_result
+        segments = []
+
+        for segment in current_segments:
+            tokens = segment["tokens"]
+            text = tokenizer.decode(tokens)
+
+            if segment["start"] == segment["end"] or not text.strip():
+                continue
+
+            segments.append(
+                Segment(
+                    id=idx + len(segments) + 1,
+                    seek=seek,
+                    start=segment["start"],
+                    end=segment["end"],
+                    text=text,
+                    tokens=tokens,
+                    temperature=temperature,
+                    avg_logprob=avg_logprob,
+                    compression_ratio=compression_ratio,
+                    no_speech_prob=result.no_speech_prob,
+                    words=(
+                        get_words(segment["words"]) if options.word_timestamps else None
+                    ),
+                )
+            )
 
-            # Recover the average log prob from the returned score.
-            seq_len = len(tokens)
-            cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
-            avg_logprob = cum_logprob / (seq_len + 1)
+        return segments
 
-            text = tokenizer.decode(tokens).strip()
-            compression_ratio = get_compression_ratio(text)
+    def generate_segments_batched(
+        self,
+        features: Union[np.ndarray, StreamingFeatures],
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+    ) -> Iterable[Segment]:
+        """Transcribes consecutive 30-second windows in batches of options.batch_size.
 
-            decode_result = (
-                result,
-                avg_logprob,
-                temperature,
-                compression_ratio,
+        The windows do not depend on each other (the previous text is not used as prompt),
+        so they are encoded and decoded with a single model call per batch. Unlike the
+        sequential decoding, the next window always starts at the end of the current one.
+        """
+        nb_max_frames = self.feature_extractor.nb_max_frames
+        time_per_frame = self.feature_extractor.time_per_frame
+        initial_prompt_tokens = self.get_initial_prompt_tokens(tokenizer, options)
+        idx = 0
+        next_seek = 0
+        last_speech_timestamp = 0.0
+
+        while True:
+            batch_seeks = []
+            segment_sizes = []
+            while len(batch_seeks) < options.batch_size:
+                content_frames = self.get_content_frames(
+                    features, next_seek + nb_max_frames
+                )
+                if next_seek >= content_frames:
+                    break
+                batch_seeks.append(next_seek)
+                segment_sizes.append(min(nb_max_frames, content_frames - next_seek))
+                next_seek += nb_max_frames
+
+            if not batch_seeks:
+                break
+
+            batch_features = np.stack(
+                [features[:, seek : seek + nb_max_frames] for seek in batch_seeks]
             )
-            all_results.append(decode_result)
 
-            needs_fallback = False
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "Processing %d segments at %s",
+                    len(batch_seeks),
+                    format_timestamp(batch_seeks[0] * time_per_frame),
+                )
+
+            prompts = [
+                self.get_prompt(
+                    tokenizer,
+                    initial_prompt_tokens if seek == 0 else [],
+                    without_timestamps=options.without_timestamps,
+                    prefix=options.prefix if seek == 0 else None,
+                )
+                for seek in batch_seeks
+            ]
 
-            if options.compression_ratio_threshold is not None:
-                if compression_ratio > options.compression_ratio_threshold:
-                    needs_fallback = True  # too repetitive
+            encoder_output = self.encode(batch_features)
+            decode_results = self.generate_batch_with_fallback(
+                batch_features, encoder_output, prompts, tokenizer, options
+            )
 
-                    self.logger.debug(
-                        "Compression ratio threshold is not met with temperature %.1f (%f > %f)",
-                        temperature,
-                        compression_ratio,
-                        options.compression_ratio_threshold,
+            batch_segments = []
+            for seek, segment_size, (result, avg_logprob, _, _) in zip(
+                batch_seeks, segment_sizes, decode_results
+            ):
+                if self.is_no_speech(result, avg_logprob, options):
+                    batch_segments.append([])
+                    continue
+
+                batch_segments.append(
+                    self.split_window_segments(
+                        tokenizer, result.sequences_ids[0], seek, segment_size
                     )
-                else:
-                    below_cr_threshold_results.append(decode_result)
+                )
 
+            if options.word_timestamps:
+                last_speech_timestamp = self.align_windows(
+                    tokenizer,
+                    batch_segments,
+                    encoder_output,
+                    segment_sizes,
+                    options,
+                    last_speech_timestamp,
+                )
+
+            for seek, segment_size, current_segments, decode_result in zip(
+                batch_seeks, segment_sizes, batch_segments, decode_results
+            ):
+                segments = self.make_segments(
+                    tokenizer,
+                    current_segments,
+                    seek + segment_size,
+                    decode_result,
+                    options,
+                    idx,
+                )
+                idx += len(segments)
+                yield from segments
+
+    def split_window_segments(
+        self,
+        tokenizer: Tokenizer,
+        tokens: List[int],
+        seek: int,
+        segment_size: int,
+    ) -> List[dict]:
+        """Splits the tokens decoded for a whole window into segments.
+
+        Unlike the sequential decoding, the text after the last complete segment is
+        kept and runs until the end of the window.
+        """
+        time_offset = seek * self.feature_extractor.time_per_frame
+        window_end = time_offset + segment_size * self.feature_extractor.time_per_frame
+        current_segments = []
+        last_slice = 0
+        is_timestamp = tokenizer.is_timestamp(tokens)
+
+        for i in get_consecutive_timestamps(is_timestamp):
+            sliced_tokens = tokens[last_slice:i]
+            current_segments.append(
+                dict(
+                    seek=seek,
+                    start=time_offset
+                    + (sliced_tokens[0] - tokenizer.timestamp_begin)
+                    * self.time_precision,
+                    end=time_offset
+                    + (sliced_tokens[-1] - tokenizer.timestamp_begin)
+                    * self.time_precision,
+                    tokens=sliced_tokens,
+                )
+            )
+            last_slice = i
+
+        remaining_tokens = tokens[last_slice:]
+
+        if last_slice == 0:
+            # No complete segment, same as the sequential decoding.
+            duration = segment_size * self.feature_extractor.time_per_frame
+            last_timestamp = get_last_timestamp(tokens, is_timestamp)
             if (
-                options.log_prob_threshold is not None
-                and avg_logprob < options.log_prob_threshold
+                last_timestamp is not None
+                and last_timestamp != tokenizer.timestamp_begin
             ):
-                needs_fallback = True  # average log probability is too low
+                last_timestamp_position = last_timestamp - tokenizer.timestamp_begin
+                duration = last_timestamp_position * self.time_precision
 
-                self.logger.debug(
-                    "Log probability threshold is not met with temperature %.1f (%f < %f)",
-                    temperature,
-                    avg_logprob,
-                    options.log_prob_threshold,
+            current_segments.append(
+                dict(
+                    seek=seek,
+                    start=time_offset,
+                    end=time_offset + duration,
+                    tokens=tokens,
+                )
+            )
+
+        elif any(token < tokenizer.eot for token in remaining_tokens):
+            # The window can not be decoded again from the last timestamp, so the
+            # unfinished segment is kept and ends with the window.
+            start_timestamp_position = remaining_tokens[0] - tokenizer.timestamp_begin
+            start_time = time_offset + start_timestamp_position * self.time_precision
+            end_time = window_end
+
+            if (
+                len(remaining_tokens) > 1
+                and remaining_tokens[-1] >= tokenizer.timestamp_begin
+            ):
+                end_timestamp_position = (
+                    remaining_tokens[-1] - tokenizer.timestamp_begin
+                )
+                end_time = time_offset + end_timestamp_position * self.time_precision
+
+            current_segments.append(
+                dict(
+                    seek=seek,
+                    start=start_time,
+                    end=end_time,
+                    tokens=remaining_tokens,
+                )
+            )
+
+        return current_segments
+
+    def get_content_frames(
+        self,
+        features: Union[np.ndarray, StreamingFeatures],
+        num_frames: int,
+    ) -> int:
+        """Returns the number of frames with audio content in the features.
+
+        If the audio is still being decoded, this waits until num_frames frames are
+        available and returns the number of frames decoded so far.
+        """
+        if isinstance(features, StreamingFeatures):
+            return features.get_content_frames(num_frames)
+        return features.shape[-1] - self.feature_extractor.nb_max_frames
+
+    def encode(
+        self, features: np.ndarray, to_cpu: bool = False
+    ) -> ctranslate2.StorageView:
+        # When the model is running on multiple GPUs, the encoder output should be moved
+        # to the CPU since we don't know which GPU will handle the next job.
+        to_cpu = to_cpu or (
+            self.model.device == "cuda" and len(self.model.device_index) > 1
+        )
+
+        if features.ndim == 2:
+            features = np.expand_dims(features, 0)
+        # The features can be stored in float16 by the feature cache.
+        features = get_ctranslate2_storage(features.astype(np.float32, copy=False))
+
+        return self.model.encode(features, to_cpu=to_cpu)
+
+    def generate_with_fallback(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        prompt: List[int],
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        first_result: Optional[ctranslate2.models.WhisperGenerationResult] = None,
+    ) -> Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float]:
+        decode_result = None
+        all_results = []
+        below_cr_threshold_results = []
+        pending_results = {}
+
+        for i, temperature in enumerate(options.temperatures):
+            if i == 0 and first_result is not None:
+                result = first_result
+            elif options.speculative_fallback > 0 and self.model.num_workers > 1:
+                # Also start decoding the next temperatures, which are used if the
+                # result of this one fails the thresholds.
+                last = min(
+                    i + options.speculative_fallback, len(options.temperatures) - 1
                 )
+                for j in range(i, last + 1):
+                    if j not in pending_results:
+                        pending_results[j] = self.model.generate(
+                            encoder_output,
+                            [prompt],
+                            asynchronous=True,
+                            **self.get_generation_kwargs(
+                                options, options.temperatures[j]
+                            ),
+                        )[0]
+
+                result = pending_results.pop(i).result()
+            else:
+                result = self.model.generate(
+                    encoder_output,
+                    [prompt],
+                    **self.get_generation_kwargs(options, temperature),
+                )[0]
+
+            decode_result, needs_fallback = self.evaluate_result(
+                result, temperature, tokenizer, options
+            )
+            all_results.append(decode_result)
 
             if (
-                options.no_speech_threshold is not None
-                and result.no_speech_prob > options.no_speech_threshold
+                options.compression_ratio_threshold is not None
+                and decode_result[3] <= options.compression_ratio_threshold
             ):
-                needs_fallback = False  # silence
+                below_cr_threshold_results.append(decode_result)
 
             if not needs_fallback:
                 break
@@ -715,6 +1750,178 @@ class WhisperModel:
 
         return decode_result
 
+    def generate_batch_with_fallback(
+        self,
+        features: np.ndarray,
+        encoder_output: ctranslate2.StorageView,
+        prompts: List[List[int]],
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+    ) -> List[Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float]]:
+        """Decodes a batch of windows with the first temperature in a single call.
+
+        Windows failing the thresholds are then decoded again one by one with the
+        next temperatures, as in generate_with_fallback.
+        """
+        temperature = options.temperatures[0]
+        results = self.model.generate(
+            encoder_output,
+            prompts,
+            **self.get_generation_kwargs(options, temperature),
+        )
+
+        decode_results = []
+        for i, result in enumerate(results):
+            decode_result, needs_fallback = self.evaluate_result(
+                result, temperature, tokenizer, options
+            )
+
+            if needs_fallback and len(options.temperatures) > 1:
+                # The batched encoder output can not be sliced, so encode the window again.
+                decode_result = self.generate_with_fallback(
+                    self.encode(features[i]),
+                    prompts[i],
+                    tokenizer,
+                    options,
+                    first_result=result,
+                )
+
+            decode_results.append(decode_result)
+
+        return decode_results
+
+    def get_generation_kwargs(
+        self, options: TranscriptionOptions, temperature: float
+    ) -> dict:
+        if temperature > 0:
+            kwargs = {
+                "beam_size": 1,
+                "num_hypotheses": options.best_of,
+                "sampling_topk": 0,
+                "sampling_temperature": temperature,
+            }
+        else:
+            kwargs = {
+                "beam_size": options.beam_size,
+                "patience": options.patience,
+            }
+
+        return dict(
+            length_penalty=options.length_penalty,
+            repetition_penalty=options.repetition_penalty,
+            no_repeat_ngram_size=options.no_repeat_ngram_size,
+            max_length=self.max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=options.suppress_blank,
+            suppress_tokens=options.suppress_tokens,
+            max_initial_timestamp_index=int(
+                round(options.max_initial_timestamp / self.time_precision)
+            ),
+            **kwargs,
+        )
+
+    def evaluate_result(
+        self,
+        result: ctranslate2.models.WhisperGenerationResult,
+        temperature: float,
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+    ) -> Tuple[
+        Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float], bool
+    ]:
+        """Computes the decoding scores and checks whether a higher temperature is needed."""
+        tokens = result.sequences_ids[0]
+
+        # Recover the average log prob from the returned score.
+        seq_len = len(tokens)
+        cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
+        avg_logprob = cum_logprob / (seq_len + 1)
+
+        text = tokenizer.decode(tokens).strip()
+        compression_ratio = get_compression_ratio(text)
+
+        decode_result = (
+            result,
+            avg_logprob,
+            temperature,
+            compression_ratio,
+        )
+
+        needs_fallback = False
+
+        if options.compression_ratio_threshold is not None:
+            if compression_ratio > options.compression_ratio_threshold:
+                needs_fallback = True  # too repetitive
+
+                self.logger.debug(
+                    "Compression ratio threshold is not met with temperature %.1f (%f > %f)",
+                    temperature,
+                    compression_ratio,
+                    options.compression_ratio_threshold,
+                )
+
+        if (
+            options.log_prob_threshold is not None
+            and avg_logprob < options.log_prob_threshold
+        ):
+            needs_fallback = True  # average log probability is too low
+
+            self.logger.debug(
+                "Log probability threshold is not met with temperature %.1f (%f < %f)",
+                temperature,
+                avg_logprob,
+                options.log_prob_threshold,
+            )
+
+        if (
+            options.no_speech_threshold is not None
+            and result.no_speech_prob > options.no_speech_threshold
+        ):
+            needs_fallback = False  # silence
+
+        return decode_result, needs_fallback
+
+    def is_no_speech(
+        self,
+        result: ctranslate2.models.WhisperGenerationResult,
+        avg_logprob: float,
+        options: TranscriptionOptions,
+    ) -> bool:
+        if options.no_speech_threshold is None:
+            return False
+
+        # no voice activity check
+        should_skip = result.no_speech_prob > options.no_speech_threshold
+
+        if (
+            options.log_prob_threshold is not None
+            and avg_logprob > options.log_prob_threshold
+        ):
+            # don't skip if the logprob is high enough, despite the no_speech_prob
+            should_skip = False
+
+        if should_skip:
+            self.logger.debug(
+                "No speech threshold is met (%f > %f)",
+                result.no_speech_prob,
+                options.no_speech_threshold,
+            )
+
+        return should_skip
+
+    def get_initial_prompt_tokens(
+        self, tokenizer: Tokenizer, options: TranscriptionOptions
+    ) -> List[int]:
+        if options.initial_prompt is None:
+            return []
+
+        if isinstance(options.initial_prompt, str):
+            initial_prompt = " " + options.initial_prompt.strip()
+            return tokenizer.encode(initial_prompt)
+
+        return list(options.initial_prompt)
+
     def get_prompt(
         self,
         tokenizer: Tokenizer,
@@ -752,6 +1959,7 @@ class WhisperModel:
         prepend_punctuations: str,
         append_punctuations: str,
         last_speech_timestamp: float,
+        alignment: Optional[WordTimings] = None,
     ) -> None:
         if len(segments) == 0:
             return
@@ -761,11 +1969,13 @@ class WhisperModel:
             for segment in segments
         ]
 
-        text_tokens = list(itertools.chain.from_iterable(text_tokens_per_segment))
-        alignment = self.find_alignment(
-            tokenizer, text_tokens, encoder_output, num_frames
-        )
-        word_durations = np.array([word["end"] - word["start"] for word in alignment])
+        if alignment is None:
+            text_tokens = list(itertools.chain.from_iterable(text_tokens_per_segment))
+            alignment = self.find_alignment(
+                tokenizer, text_tokens, encoder_output, num_frames
+            )
+
+        word_durations = alignment.end - alignment.start
         word_durations = word_durations[word_durations.nonzero()]
         median_duration = np.median(word_durations) if len(word_durations) > 0 else 0.0
         max_duration = median_duration * 2
@@ -774,14 +1984,20 @@ class WhisperModel:
         # a better segmentation algorithm based on VAD should be able to replace this.
         if len(word_durations) > 0:
             sentence_end_marks = ".。!！?？"
+            is_sentence_end = np.array(
+                [word in sentence_end_marks for word in alignment.word], dtype=bool
+            )
             # ensure words at sentence boundaries
             # are not longer than twice the median word duration.
-            for i in range(1, len(alignment)):
-                if alignment[i]["end"] - alignment[i]["start"] > max_duration:
-                    if alignment[i]["word"] in sentence_end_marks:
-                        alignment[i]["end"] = alignment[i]["start"] + max_duration
-                    elif alignment[i - 1]["word"] in sentence_end_marks:
-                        alignment[i]["start"] = alignment[i]["end"] - max_duration
+            too_long = alignment.end - alignment.start > max_duration
+            too_long[:1] = False
+            truncate_end = too_long & is_sentence_end
+            truncate_start = too_long & ~is_sentence_end
+            truncate_start[1:] &= is_sentence_end[:-1]
+            alignment.end[truncate_end] = alignment.start[truncate_end] + max_duration
+            alignment.start[truncate_start] = (
+                alignment.end[truncate_start] - max_duration
+            )
 
         merge_punctuations(alignment, prepend_punctuations, append_punctuations)
 
@@ -791,71 +2007,60 @@ class WhisperModel:
             / self.feature_extractor.sampling_rate
         )
 
+        token_ends = np.cumsum(alignment.num_tokens)
         word_index = 0
 
         for segment, text_tokens in zip(segments, text_tokens_per_segment):
-            saved_tokens = 0
-            words = []
-
-            while word_index < len(alignment) and saved_tokens < len(text_tokens):
-                timing = alignment[word_index]
-
-                if timing["word"]:
-                    words.append(
-                        dict(
-                            word=timing["word"],
-                            start=round(time_offset + timing["start"], 2),
-                            end=round(time_offset + timing["end"], 2),
-                            probability=timing["probability"],
-                        )
-                    )
+            # The segment words are the next ones which cover its text tokens.
+            if len(text_tokens) > 0 and word_index < len(alignment.word):
+                saved_tokens = token_ends[word_index - 1] if word_index > 0 else 0
+                last_index = np.searchsorted(
+                    token_ends, saved_tokens + len(text_tokens)
+                )
+                next_word_index = min(last_index + 1, len(alignment.word))
+            else:
+                next_word_index = word_index
 
-                saved_tokens += len(timing["tokens"])
-                word_index += 1
+            indices = [
+                i for i in range(word_index, next_word_index) if alignment.word[i]
+            ]
+            word_index = next_word_index
+
+            words = WordTimings(
+                word=[alignment.word[i] for i in indices],
+                num_tokens=alignment.num_tokens[indices],
+                start=np.round(time_offset + alignment.start[indices], 2),
+                end=np.round(time_offset + alignment.end[indices], 2),
+                probability=alignment.probability[indices],
+            )
+            starts = words.start
+            ends = words.end
 
             # hack: truncate long words at segment boundaries.
             # a better segmentation algorithm based on VAD should be able to replace this.
-            if len(words) > 0:
+            if len(indices) > 0:
                 # ensure the first and second word after a pause is not longer than
                 # twice the median word duration.
-                if words[0]["end"] - last_speech_timestamp > median_duration * 4 and (
-                    words[0]["end"] - words[0]["start"] > max_duration
-                    or (
-                        len(words) > 1
-                        and words[1]["end"] - words[0]["start"] > max_duration * 2
-                    )
+                if ends[0] - last_speech_timestamp > median_duration * 4 and (
+                    ends[0] - starts[0] > max_duration
+                    or (len(ends) > 1 and ends[1] - starts[0] > max_duration * 2)
                 ):
-                    if (
-                        len(words) > 1
-                        and words[1]["end"] - words[1]["start"] > max_duration
-                    ):
-                        boundary = max(
-                            words[1]["end"] / 2, words[1]["end"] - max_duration
-                        )
-                        words[0]["end"] = words[1]["start"] = boundary
-                    words[0]["start"] = max(0, words[0]["end"] - max_duration)
+                    if len(ends) > 1 and ends[1] - starts[1] > max_duration:
+                        boundary = max(ends[1] / 2, ends[1] - max_duration)
+                        ends[0] = starts[1] = boundary
+                    starts[0] = max(0, ends[0] - max_duration)
 
                 # prefer the segment-level start timestamp if the first word is too long.
-                if (
-                    segment["start"] < words[0]["end"]
-                    and segment["start"] - 0.5 > words[0]["start"]
-                ):
-                    words[0]["start"] = max(
-                        0, min(words[0]["end"] - median_duration, segment["start"])
-                    )
+                if segment["start"] < ends[0] and segment["start"] - 0.5 > starts[0]:
+                    starts[0] = max(0, min(ends[0] - median_duration, segment["start"]))
                 else:
-                    segment["start"] = words[0]["start"]
+                    segment["start"] = float(starts[0])
 
                 # prefer the segment-level end timestamp if the last word is too long.
-                if (
-                    segment["end"] > words[-1]["start"]
-                    and segment["end"] + 0.5 < words[-1]["end"]
-                ):
-                    words[-1]["end"] = max(
-                        words[-1]["start"] + median_duration, segment["end"]
-                    )
+                if segment["end"] > starts[-1] and segment["end"] + 0.5 < ends[-1]:
+                    ends[-1] = max(starts[-1] + median_duration, segment["end"])
                 else:
-                    segment["end"] = words[-1]["end"]
+                    segment["end"] = float(ends[-1])
 
                 last_speech_timestamp = segment["end"]
 
@@ -868,21 +2073,56 @@ class WhisperModel:
         encoder_output: ctranslate2.StorageView,
         num_frames: int,
         median_filter_width: int = 7,
-    ) -> List[dict]:
+    ) -> WordTimings:
         if len(text_tokens) == 0:
-            return []
+            return get_empty_word_timings()
 
-        result = self.model.align(
+        return self.find_alignments(
+            tokenizer,
+            [text_tokens],
+            encoder_output,
+            [num_frames],
+            median_filter_width=median_filter_width,
+        )[0]
+
+    def find_alignments(
+        self,
+        tokenizer: Tokenizer,
+        text_tokens: List[List[int]],
+        encoder_output: ctranslate2.StorageView,
+        num_frames: List[int],
+        median_filter_width: int = 7,
+    ) -> List[WordTimings]:
+        """Aligns the text tokens of each batch item with a single model call."""
+        if not any(text_tokens):
+            return [get_empty_word_timings() for _ in text_tokens]
+
+        results = self.model.align(
             encoder_output,
             tokenizer.sot_sequence,
-            [text_tokens],
+            text_tokens,
             num_frames,
             median_filter_width=median_filter_width,
-        )[0]
+        )
 
-        text_token_probs = result.text_token_probs
+        return [
+            (
+                self.get_word_timings(
+                    tokenizer, tokens, result.alignments, result.text_token_probs
+                )
+                if tokens
+                else get_empty_word_timings()
+            )
+            for tokens, result in zip(text_tokens, results)
+        ]
 
-        alignments = result.alignments
+    def get_word_timings(
+        self,
+        tokenizer: Tokenizer,
+        text_tokens: List[int],
+        alignments: List[Tuple[int, int]],
+        text_token_probs: List[float],
+    ) -> WordTimings:
         text_indices = np.array([pair[0] for pair in alignments])
         time_indices = np.array([pair[1] for pair in alignments])
 
@@ -891,33 +2131,51 @@ class WhisperModel:
         )
         word_boundaries = np.pad(np.cumsum([len(t) for t in word_tokens[:-1]]), (1, 0))
         if len(word_boundaries) <= 1:
-            return []
+            return get_empty_word_timings()
 
         jumps = np.pad(np.diff(text_indices), (1, 0), constant_values=1).astype(bool)
         jump_times = time_indices[jumps] / self.tokens_per_second
         start_times = jump_times[word_boundaries[:-1]]
         end_times = jump_times[word_boundaries[1:]]
-        word_probabilities = [
-            np.mean(text_token_probs[i:j])
-            for i, j in zip(word_boundaries[:-1], word_boundaries[1:])
-        ]
+        word_probabilities = np.array(
+            [
+                np.mean(text_token_probs[i:j])
+                for i, j in zip(word_boundaries[:-1], word_boundaries[1:])
+            ]
+        )
 
-        return [
-            dict(
-                word=word, tokens=tokens, start=start, end=end, probability=probability
-            )
-            for word, tokens, start, end, probability in zip(
-                words, word_tokens, start_times, end_times, word_probabilities
-            )
-        ]
+        # The last word only contains the end of text token.
+        num_words = len(word_boundaries) - 1
+        return WordTimings(
+            word=words[:num_words],
+            num_tokens=np.diff(word_boundaries),
+            start=start_times,
+            end=end_times,
+            probability=word_probabilities,
+        )
+
+
+def collect_streamed_chunks(
+    audio: Union[np.ndarray, AudioBuffer],
+    vad_options: VadOptions,
+    ts_map: SpeechTimestampsMap,
+) -> Iterable[np.ndarray]:
+    """Yields the audio of each speech chunk as soon as it is found by the VAD, after
+    adding the chunk to the timestamps map."""
+    for start, end in stream_speech_chunks(audio, vad_options):
+        ts_map.add_chunk(start, end)
+        yield audio[start:end]
 
 
 def restore_speech_timestamps(
     segments: Iterable[Segment],
-    speech_chunks: List[dict],
+    speech_chunks: Union[List[dict], np.ndarray, SpeechTimestampsMap],
     sampling_rate: int,
 ) -> Iterable[Segment]:
-    ts_map = SpeechTimestampsMap(speech_chunks, sampling_rate)
+    if isinstance(speech_chunks, SpeechTimestampsMap):
+        ts_map = speech_chunks
+    else:
+        ts_map = SpeechTimestampsMap(speech_chunks, sampling_rate)
 
     for segment in segments:
         if segment.words:
@@ -947,6 +2205,26 @@ def restore_speech_timestamps(
         yield segment
 
 
+def _get_vad_options(vad_parameters: Optional[Union[dict, VadOptions]]) -> VadOptions:
+    if vad_parameters is None:
+        return VadOptions()
+    if isinstance(vad_parameters, dict):
+        return VadOptions(**vad_parameters)
+    return vad_parameters
+
+
+def get_consecutive_timestamps(is_timestamp: np.ndarray) -> List[int]:
+    """Returns the positions of the timestamps following another timestamp, where the
+    decoded tokens are split into segments."""
+    return (np.flatnonzero(is_timestamp[1:] & is_timestamp[:-1]) + 1).tolist()
+
+
+def get_last_timestamp(tokens: List[int], is_timestamp: np.ndarray) -> Optional[int]:
+    """Returns the last timestamp token, if any."""
+    positions = np.flatnonzero(is_timestamp)
+    return tokens[positions[-1]] if len(positions) > 0 else None
+
+
 def get_ctranslate2_storage(segment: np.ndarray) -> ctranslate2.StorageView:
     segment = np.ascontiguousarray(segment)
     segment = ctranslate2.StorageView.from_array(segment)
@@ -982,19 +2260,21 @@ def get_suppressed_tokens(
     return sorted(set(suppress_tokens))
 
 
-def merge_punctuations(alignment: List[dict], prepended: str, appended: str) -> None:
+def merge_punctuations(alignment: WordTimings, prepended: str, appended: str) -> None:
+    words = alignment.word
+    num_tokens = alignment.num_tokens
+
     # merge prepended punctuations
-    i = len(alignment) - 2
-    j = len(alignment) - 1
+    i = len(words) - 2
+    j = len(words) - 1
     while i >= 0:
-        previous = alignment[i]
-        following = alignment[j]
-        if previous["word"].startswith(" ") and previous["word"].strip() in prepended:
+        previous = words[i]
+        if previous.startswith(" ") and previous.strip() in prepended:
             # prepend it to the following word
-            following["word"] = previous["word"] + following["word"]
-            following["tokens"] = previous["tokens"] + following["tokens"]
-            previous["word"] = ""
-            previous["tokens"] = []
+            words[j] = previous + words[j]
+            num_tokens[j] += num_tokens[i]
+            words[i] = ""
+            num_tokens[i] = 0
         else:
             j = i
         i -= 1
@@ -1002,15 +2282,44 @@ def merge_punctuations(alignment: List[dict], prepended: str, appended: str) ->
     # merge appended punctuations
     i = 0
     j = 1
-    while j < len(alignment):
-        previous = alignment[i]
-        following = alignment[j]
-        if not previous["word"].endswith(" ") and following["word"] in appended:
+    while j < len(words):
+        following = words[j]
+        if not words[i].endswith(" ") and following in appended:
             # append it to the previous word
-            previous["word"] = previous["word"] + following["word"]
-            previous["tokens"] = previous["tokens"] + following["tokens"]
-            following["word"] = ""
-            following["tokens"] = []
+            words[i] = words[i] + following
+            num_tokens[i] += num_tokens[j]
+            words[j] = ""
+            num_tokens[j] = 0
         else:
             i = j
         j += 1
+
+
+def get_empty_word_timings() -> WordTimings:
+    return WordTimings(
+        word=[],
+        num_tokens=np.zeros(0, dtype=np.int64),
+        start=np.zeros(0),
+        end=np.zeros(0),
+        probability=np.zeros(0),
+    )
+
+
+def get_last_word_end(segments: List[dict]) -> Optional[float]:
+    """Returns the end of the last word in the segments with word timings, if any."""
+    for segment in reversed(segments):
+        if len(segment["words"].end) > 0:
+            return segment["words"].end[-1]
+    return None
+
+
+def get_words(word_timings: WordTimings) -> List[Word]:
+    return [
+        Word(start=start, end=end, word=word, probability=probability)
+        for word, start, end, probability in zip(
+            word_timings.word,
+            word_timings.start.tolist(),
+            word_timings.end.tolist(),
+            word_timings.probability.tolist(),
+        )
+    ]
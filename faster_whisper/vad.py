@@ -1,12 +1,15 @@
 import bisect
+import concurrent.futures
 import functools
+import math
 import os
 import warnings
 
-from typing import List, NamedTuple, Optional
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
 
 import numpy as np
 
+from faster_whisper.audio import AudioBuffer
 from faster_whisper.utils import get_assets_path
 
 
@@ -29,6 +32,10 @@ class VadOptions(NamedTuple):
         WARNING! Silero VAD models were trained using 512, 1024, 1536 samples for 16000 sample rate.
         Values other than these may affect model performance!!
       speech_pad_ms: Final speech chunks are padded by speech_pad_ms each side
+      shard_duration_s: If set, the speech probabilities of audio shards of this duration
+        are computed in parallel threads instead of sequentially over the whole audio.
+      shard_overlap_s: Duration of audio before each shard used to initialize the model
+        state, when shard_duration_s is set.
     """
 
     threshold: float = 0.5
@@ -37,6 +44,8 @@ class VadOptions(NamedTuple):
     min_silence_duration_ms: int = 2000
     window_size_samples: int = 1024
     speech_pad_ms: int = 400
+    shard_duration_s: Optional[float] = None
+    shard_overlap_s: float = 30.0
 
 
 def get_speech_timestamps(
@@ -54,166 +63,561 @@ def get_speech_timestamps(
     Returns:
       List of dicts containing begin and end samples of each speech chunk.
     """
+    speech_chunks = get_speech_chunks(audio, vad_options, **kwargs)
+    return [{"start": start, "end": end} for start, end in speech_chunks.tolist()]
+
+
+def get_speech_chunks(
+    audio: np.ndarray,
+    vad_options: Optional[VadOptions] = None,
+    **kwargs,
+) -> np.ndarray:
+    """Splits the audio into speech chunks using silero VAD.
+
+    This is the same as get_speech_timestamps but the speech chunks are returned as an
+    array, which is accepted by collect_chunks and SpeechTimestampsMap.
+
+    Args:
+      audio: One dimensional float array.
+      vad_options: Options for VAD processing.
+      kwargs: VAD options passed as keyword arguments for backward compatibility.
+
+    Returns:
+      A int64 array of shape (num_chunks, 2) with the begin and end samples of each
+      speech chunk.
+    """
     if vad_options is None:
         vad_options = VadOptions(**kwargs)
 
-    threshold = vad_options.threshold
-    min_speech_duration_ms = vad_options.min_speech_duration_ms
-    max_speech_duration_s = vad_options.max_speech_duration_s
-    min_silence_duration_ms = vad_options.min_silence_duration_ms
-    window_size_samples = vad_options.window_size_samples
-    speech_pad_ms = vad_options.speech_pad_ms
-
-    if window_size_samples not in [512, 1024, 1536]:
-        warnings.warn(
-            "Unusual window_size_samples! Supported window_size_samples:\n"
-            " - [512, 1024, 1536] for 16000 sampling_rate"
+    sampling_rate = 16000
+    tracker = _SpeechChunkTracker(vad_options, sampling_rate)
+    audio_length_samples = len(audio)
+
+    speech_probs = get_speech_probs(
+        audio,
+        tracker.window_size_samples,
+        shard_size_samples=(
+            int(vad_options.shard_duration_s * sampling_rate)
+            if vad_options.shard_duration_s is not None
+            else None
+        ),
+        shard_overlap_samples=int(vad_options.shard_overlap_s * sampling_rate),
+    )
+
+    if math.isinf(vad_options.max_speech_duration_s):
+        speeches = _find_speech_chunks(
+            speech_probs,
+            tracker.threshold,
+            tracker.window_size_samples,
+            tracker.min_speech_samples,
+            tracker.min_silence_samples,
+            audio_length_samples,
         )
+    else:
+        # Splitting the chunks longer than max_speech_duration_s depends on the
+        # previous splits, so the windows are processed one by one.
+        tracker.process(speech_probs)
+        speeches = tracker.finish(audio_length_samples)
+
+    return _pad_speech_chunks(
+        speeches, tracker.speech_pad_samples, audio_length_samples
+    )
 
-    sampling_rate = 16000
-    min_speech_samples = sampling_rate * min_speech_duration_ms / 1000
-    speech_pad_samples = sampling_rate * speech_pad_ms / 1000
-    max_speech_samples = (
-        sampling_rate * max_speech_duration_s
-        - window_size_samples
-        - 2 * speech_pad_samples
+
+def stream_speech_chunks(
+    audio: Union[np.ndarray, AudioBuffer],
+    vad_options: Optional[VadOptions] = None,
+    block_size_samples: int = 30 * 16000,
+) -> Iterator[Tuple[int, int]]:
+    """Splits the audio into speech chunks using silero VAD, yielding each chunk as soon
+    as it is known.
+
+    The speech probabilities are computed on consecutive blocks of the audio, which can
+    be an AudioBuffer that is still being filled. A chunk is yielded when it is closed
+    and its padding no longer depends on the next chunk, so the chunks are the same as
+    the ones returned by get_speech_chunks (shard_duration_s is ignored).
+
+    Args:
+      audio: One dimensional float array or AudioBuffer.
+      vad_options: Options for VAD processing.
+      block_size_samples: Number of samples processed before looking for new chunks.
+
+    Returns:
+      A generator over the begin and end samples of each speech chunk.
+    """
+    if vad_options is None:
+        vad_options = VadOptions()
+
+    tracker = _SpeechChunkTracker(vad_options)
+    window_size_samples = tracker.window_size_samples
+    speech_pad_samples = tracker.speech_pad_samples
+    num_yielded_chunks = 0
+
+    for speech_probs, num_samples, finished in _iter_speech_probs(
+        audio, window_size_samples, block_size_samples
+    ):
+        tracker.process(speech_probs)
+
+        if finished:
+            speeches = tracker.finish(num_samples)
+            speeches = _pad_speech_chunks(speeches, speech_pad_samples, num_samples)
+            for start, end in speeches[num_yielded_chunks:].tolist():
+                yield start, end
+            return
+
+        speeches = tracker.speeches
+
+        # Lower bound of the start of the chunks that are not closed yet.
+        next_start = tracker.current_speech.get(
+            "start", tracker.num_windows * window_size_samples
+        )
+
+        while num_yielded_chunks < len(speeches):
+            index = num_yielded_chunks
+            neighbors = speeches[max(index - 1, 0) : index + 2]
+            neighbors = [[speech["start"], speech["end"]] for speech in neighbors]
+
+            if index + 1 == len(speeches):
+                # The end padding is final if the next chunk cannot be closer than
+                # twice the padding.
+                if next_start - speeches[index]["end"] < 2 * speech_pad_samples:
+                    break
+                neighbors.append([next_start, next_start])
+
+            padded = _pad_speech_chunks(
+                np.array(neighbors, dtype=np.int64), speech_pad_samples, num_samples
+            )
+            start, end = padded[-2].tolist()
+            num_yielded_chunks += 1
+            yield start, end
+
+
+def _find_speech_chunks(
+    speech_probs,
+    threshold,
+    window_size_samples,
+    min_speech_samples,
+    min_silence_samples,
+    audio_length_samples,
+):
+    """Finds the speech chunks with array operations.
+
+    A speech chunk starts at a speech window and continues over the next speech
+    windows, unless the silence windows between two speech windows span at least
+    min_silence_samples: the chunk then ends at the first of these silence windows.
+    """
+    speech_windows = np.flatnonzero(speech_probs >= np.float32(threshold))
+    silence_windows = np.flatnonzero(speech_probs < np.float32(threshold - 0.15))
+
+    if speech_windows.size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Gaps after each speech window, until the next speech window or the end.
+    gap_ends = np.append(speech_windows[1:], speech_probs.shape[0])
+    first_silence = np.searchsorted(silence_windows, speech_windows, side="right")
+    last_silence = np.searchsorted(silence_windows, gap_ends, side="left") - 1
+
+    has_silence = first_silence <= last_silence
+    if silence_windows.size > 0:
+        silence_start = silence_windows[
+            np.minimum(first_silence, silence_windows.size - 1)
+        ]
+        silence_end = silence_windows[np.maximum(last_silence, 0)]
+    else:
+        silence_start = silence_end = np.zeros_like(speech_windows)
+
+    breaks = has_silence & (
+        window_size_samples * (silence_end - silence_start) >= min_silence_samples
     )
-    min_silence_samples = sampling_rate * min_silence_duration_ms / 1000
-    min_silence_samples_at_max_speech = sampling_rate * 98 / 1000
 
-    audio_length_samples = len(audio)
+    # The last chunk is kept until the end of the audio if it is not ended by silence.
+    starts = np.concatenate([speech_windows[:1], speech_windows[1:][breaks[:-1]]])
+    ends = silence_start[breaks]
+    starts = window_size_samples * starts
+    ends = window_size_samples * ends
+    if ends.shape[0] < starts.shape[0]:
+        ends = np.append(ends, audio_length_samples)
 
-    model = get_vad_model()
-    state = model.get_initial_state(batch_size=1)
+    speeches = np.stack([starts, ends], axis=1).astype(np.int64)
+    return speeches[speeches[:, 1] - speeches[:, 0] > min_speech_samples]
 
-    speech_probs = []
-    for current_start_sample in range(0, audio_length_samples, window_size_samples):
-        chunk = audio[current_start_sample : current_start_sample + window_size_samples]
-        if len(chunk) < window_size_samples:
-            chunk = np.pad(chunk, (0, int(window_size_samples - len(chunk))))
-        speech_prob, state = model(chunk, state, sampling_rate)
-        speech_probs.append(speech_prob)
-
-    triggered = False
-    speeches = []
-    current_speech = {}
-    neg_threshold = threshold - 0.15
-
-    # to save potential segment end (and tolerate some silence)
-    temp_end = 0
-    # to save potential segment limits in case of maximum segment size reached
-    prev_end = next_start = 0
-
-    for i, speech_prob in enumerate(speech_probs):
-        if (speech_prob >= threshold) and temp_end:
-            temp_end = 0
-            if next_start < prev_end:
-                next_start = window_size_samples * i
-
-        if (speech_prob >= threshold) and not triggered:
-            triggered = True
-            current_speech["start"] = window_size_samples * i
-            continue
 
-        if (
-            triggered
-            and (window_size_samples * i) - current_speech["start"] > max_speech_samples
+class _SpeechChunkTracker:
+    """Finds the speech chunks by processing the speech probabilities window by window.
+
+    The speech probabilities can be passed in consecutive blocks. The chunks closed
+    after a block are final since they only depend on the previous windows.
+    """
+
+    def __init__(self, vad_options: VadOptions, sampling_rate: int = 16000):
+        window_size_samples = vad_options.window_size_samples
+
+        if window_size_samples not in [512, 1024, 1536]:
+            warnings.warn(
+                "Unusual window_size_samples! Supported window_size_samples:\n"
+                " - [512, 1024, 1536] for 16000 sampling_rate"
+            )
+
+        self.threshold = vad_options.threshold
+        self.window_size_samples = window_size_samples
+        self.min_speech_samples = (
+            sampling_rate * vad_options.min_speech_duration_ms / 1000
+        )
+        self.speech_pad_samples = sampling_rate * vad_options.speech_pad_ms / 1000
+        self.max_speech_samples = (
+            sampling_rate * vad_options.max_speech_duration_s
+            - window_size_samples
+            - 2 * self.speech_pad_samples
+        )
+        self.min_silence_samples = (
+            sampling_rate * vad_options.min_silence_duration_ms / 1000
+        )
+        self.min_silence_samples_at_max_speech = sampling_rate * 98 / 1000
+
+        self.num_windows = 0
+        self.speeches = []
+        self.current_speech = {}
+        self.triggered = False
+        # to save potential segment end (and tolerate some silence)
+        self.temp_end = 0
+        # to save potential segment limits in case of maximum segment size reached
+        self.prev_end = self.next_start = 0
+
+    def process(self, speech_probs: np.ndarray) -> None:
+        """Processes the speech probabilities of the next windows."""
+        # The probabilities are compared in single precision like in
+        # _find_speech_chunks, so that both find the same chunks.
+        speech_probs = np.asarray(speech_probs, dtype=np.float32)
+        is_speech = (speech_probs >= np.float32(self.threshold)).tolist()
+        is_silence = (speech_probs < np.float32(self.threshold - 0.15)).tolist()
+        window_size_samples = self.window_size_samples
+        min_speech_samples = self.min_speech_samples
+        max_speech_samples = self.max_speech_samples
+        min_silence_samples = self.min_silence_samples
+        min_silence_samples_at_max_speech = self.min_silence_samples_at_max_speech
+
+        speeches = self.speeches
+        current_speech = self.current_speech
+        triggered = self.triggered
+        temp_end = self.temp_end
+        prev_end = self.prev_end
+        next_start = self.next_start
+
+        for i, (speech, silence) in enumerate(
+            zip(is_speech, is_silence), self.num_windows
         ):
-            if prev_end:
-                current_speech["end"] = prev_end
-                speeches.append(current_speech)
-                current_speech = {}
-                # previously reached silence (< neg_thres) and is still not speech (< thres)
+            if speech and temp_end:
+                temp_end = 0
                 if next_start < prev_end:
-                    triggered = False
-                else:
-                    current_speech["start"] = next_start
-                prev_end = next_start = temp_end = 0
-            else:
-                current_speech["end"] = window_size_samples * i
-                speeches.append(current_speech)
-                current_speech = {}
-                prev_end = next_start = temp_end = 0
-                triggered = False
-                continue
+                    next_start = window_size_samples * i
 
-        if (speech_prob < neg_threshold) and triggered:
-            if not temp_end:
-                temp_end = window_size_samples * i
-            # condition to avoid cutting in very short silence
-            if (window_size_samples * i) - temp_end > min_silence_samples_at_max_speech:
-                prev_end = temp_end
-            if (window_size_samples * i) - temp_end < min_silence_samples:
+            if speech and not triggered:
+                triggered = True
+                current_speech["start"] = window_size_samples * i
                 continue
-            else:
-                current_speech["end"] = temp_end
-                if (
-                    current_speech["end"] - current_speech["start"]
-                ) > min_speech_samples:
+
+            if (
+                triggered
+                and (window_size_samples * i) - current_speech["start"]
+                > max_speech_samples
+            ):
+                if prev_end:
+                    current_speech["end"] = prev_end
                     speeches.append(current_speech)
-                current_speech = {}
-                prev_end = next_start = temp_end = 0
-                triggered = False
-                continue
+                    current_speech = {}
+                    # previously reached silence (< neg_thres) and is still not speech (< thres)
+                    if next_start < prev_end:
+                        triggered = False
+                    else:
+                        current_speech["start"] = next_start
+                    prev_end = next_start = temp_end = 0
+                else:
+                    current_speech["end"] = window_size_samples * i
+                    speeches.append(current_speech)
+                    current_speech = {}
+                    prev_end = next_start = temp_end = 0
+                    triggered = False
+                    continue
 
-    if (
-        current_speech
-        and (audio_length_samples - current_speech["start"]) > min_speech_samples
-    ):
-        current_speech["end"] = audio_length_samples
-        speeches.append(current_speech)
-
-    for i, speech in enumerate(speeches):
-        if i == 0:
-            speech["start"] = int(max(0, speech["start"] - speech_pad_samples))
-        if i != len(speeches) - 1:
-            silence_duration = speeches[i + 1]["start"] - speech["end"]
-            if silence_duration < 2 * speech_pad_samples:
-                speech["end"] += int(silence_duration // 2)
-                speeches[i + 1]["start"] = int(
-                    max(0, speeches[i + 1]["start"] - silence_duration // 2)
-                )
-            else:
-                speech["end"] = int(
-                    min(audio_length_samples, speech["end"] + speech_pad_samples)
-                )
-                speeches[i + 1]["start"] = int(
-                    max(0, speeches[i + 1]["start"] - speech_pad_samples)
-                )
-        else:
-            speech["end"] = int(
-                min(audio_length_samples, speech["end"] + speech_pad_samples)
-            )
+            if silence and triggered:
+                if not temp_end:
+                    temp_end = window_size_samples * i
+                # condition to avoid cutting in very short silence
+                if (
+                    window_size_samples * i
+                ) - temp_end > min_silence_samples_at_max_speech:
+                    prev_end = temp_end
+                if (window_size_samples * i) - temp_end < min_silence_samples:
+                    continue
+                else:
+                    current_speech["end"] = temp_end
+                    if (
+                        current_speech["end"] - current_speech["start"]
+                    ) > min_speech_samples:
+                        speeches.append(current_speech)
+                    current_speech = {}
+                    prev_end = next_start = temp_end = 0
+                    triggered = False
+                    continue
+
+        self.num_windows += len(speech_probs)
+        self.current_speech = current_speech
+        self.triggered = triggered
+        self.temp_end = temp_end
+        self.prev_end = prev_end
+        self.next_start = next_start
+
+    def finish(self, audio_length_samples: int) -> np.ndarray:
+        """Closes the current chunk at the end of the audio and returns all chunks."""
+        speeches = list(self.speeches)
+        current_speech = self.current_speech
+
+        if (
+            current_speech
+            and (audio_length_samples - current_speech["start"])
+            > self.min_speech_samples
+        ):
+            speeches.append(dict(current_speech, end=audio_length_samples))
+
+        return np.array(
+            [[speech["start"], speech["end"]] for speech in speeches], dtype=np.int64
+        ).reshape(-1, 2)
+
+
+def _pad_speech_chunks(speeches, speech_pad_samples, audio_length_samples):
+    """Pads the speech chunks, or splits the silence between chunks closer than
+    twice the padding."""
+    speeches = speeches.copy()
+    if speeches.shape[0] == 0:
+        return speeches
+
+    starts = speeches[:, 0]
+    ends = speeches[:, 1]
+    silence_durations = starts[1:] - ends[:-1]
+    split_silence = silence_durations < 2 * speech_pad_samples
+
+    padded_starts = np.maximum(0, starts - speech_pad_samples).astype(np.int64)
+    padded_ends = np.minimum(audio_length_samples, ends + speech_pad_samples).astype(
+        np.int64
+    )
+
+    speeches[1:, 0] = np.where(
+        split_silence,
+        np.maximum(0, starts[1:] - silence_durations // 2),
+        padded_starts[1:],
+    )
+    speeches[:-1, 1] = np.where(
+        split_silence,
+        ends[:-1] + silence_durations // 2,
+        padded_ends[:-1],
+    )
+    speeches[0, 0] = padded_starts[0]
+    speeches[-1, 1] = padded_ends[-1]
 
     return speeches
 
 
-def collect_chunks(audio: np.ndarray, chunks: List[dict]) -> np.ndarray:
+def get_speech_probs(
+    audio: np.ndarray,
+    window_size_samples: int = 1024,
+    shard_size_samples: Optional[int] = None,
+    shard_overlap_samples: int = 0,
+) -> np.ndarray:
+    """Computes the speech probability of each window of the audio with Silero VAD.
+
+    Args:
+      audio: One dimensional float array. It can also be a 2-dimensional array of
+        independent audios with the same length, which are processed in the same model
+        calls.
+      window_size_samples: Number of samples in each window. The last window is
+        padded with zeros.
+      shard_size_samples: If set, the audio is split in shards of this size which are
+        processed in parallel threads. The model state at the start of each shard is
+        then approximated by running the model on the shard_overlap_samples before it.
+      shard_overlap_samples: Number of samples before each shard used to initialize
+        the model state.
+
+    Returns:
+      A float32 array with the speech probability of each window, with shape
+      (num_windows,) or (num_audios, num_windows).
+    """
+    batched = audio.ndim == 2
+    if not batched:
+        audio = np.expand_dims(audio, 0)
+
+    num_windows = -(-audio.shape[-1] // window_size_samples)
+
+    if shard_size_samples is None or shard_size_samples >= audio.shape[-1]:
+        speech_probs = _get_windows_speech_probs(
+            audio, window_size_samples, 0, num_windows
+        )
+
+    else:
+        shard_windows = max(shard_size_samples // window_size_samples, 1)
+        overlap_windows = -(-shard_overlap_samples // window_size_samples)
+
+        def _process_shard(start):
+            warmup_start = max(start - overlap_windows, 0)
+            end = min(start + shard_windows, num_windows)
+            speech_probs = _get_windows_speech_probs(
+                audio, window_size_samples, warmup_start, end
+            )
+            return speech_probs[:, start - warmup_start :]
+
+        shard_starts = range(0, num_windows, shard_windows)
+        max_workers = min(len(shard_starts), os.cpu_count() or 1)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            speech_probs = np.concatenate(
+                list(executor.map(_process_shard, shard_starts)), axis=1
+            )
+
+    return speech_probs if batched else speech_probs[0]
+
+
+def _get_windows_speech_probs(audio, window_size_samples, start, end):
+    """Runs the model from the initial state on the windows start to end."""
+    model = get_vad_model()
+    state = model.get_initial_state(batch_size=audio.shape[0])
+    speech_probs, _ = _run_vad_model(
+        model,
+        audio[:, start * window_size_samples : end * window_size_samples],
+        window_size_samples,
+        state,
+    )
+    return speech_probs
+
+
+def _iter_speech_probs(audio, window_size_samples, block_size_samples):
+    """Yields the speech probabilities of consecutive blocks of the audio, with the
+    number of samples processed so far and whether the end of the audio is reached."""
+    model = get_vad_model()
+    state = model.get_initial_state(batch_size=1)
+    block_size_samples = (
+        max(block_size_samples // window_size_samples, 1) * window_size_samples
+    )
+    position = 0
+
+    while True:
+        if isinstance(audio, AudioBuffer):
+            audio.wait(position + block_size_samples)
+            finished = audio.finished
+            num_samples = len(audio)
+        else:
+            finished = True
+            num_samples = audio.shape[0]
+
+        end = min(position + block_size_samples, num_samples)
+        finished = finished and end == num_samples
+        if not finished:
+            # Only full windows are processed until the end of the audio.
+            end -= (end - position) % window_size_samples
+
+        speech_probs, state = _run_vad_model(
+            model, np.expand_dims(audio[position:end], 0), window_size_samples, state
+        )
+        position = end
+
+        yield speech_probs[0], position, finished
+
+        if finished:
+            break
+
+
+def _run_vad_model(model, audio, window_size_samples, state):
+    """Runs the model on all windows of the audio of shape (num_audios, num_samples).
+
+    The last window is padded with zeros.
+    """
+    num_samples = audio.shape[-1]
+    num_full_windows = num_samples // window_size_samples
+
+    # Windows of shape (num_windows, num_audios, window_size_samples), which is a view
+    # of the audio when it is contiguous.
+    windows = (
+        audio[:, : num_full_windows * window_size_samples]
+        .reshape(audio.shape[0], -1, window_size_samples)
+        .swapaxes(0, 1)
+    )
+
+    speech_probs, state = model.run(windows, state, 16000)
+
+    remaining_samples = num_samples - num_full_windows * window_size_samples
+    if remaining_samples > 0:
+        last_window = np.zeros(
+            (1, audio.shape[0], window_size_samples), dtype=audio.dtype
+        )
+        last_window[0, :, :remaining_samples] = audio[:, -remaining_samples:]
+        last_speech_probs, state = model.run(last_window, state, 16000)
+        speech_probs = np.concatenate([speech_probs, last_speech_probs])
+
+    return speech_probs.T, state
+
+
+def collect_chunks(
+    audio: np.ndarray, chunks: Union[List[dict], np.ndarray]
+) -> np.ndarray:
     """Collects and concatenates audio chunks."""
-    if not chunks:
+    chunks = _as_chunks_array(chunks)
+    if chunks.shape[0] == 0:
         return np.array([], dtype=np.float32)
 
-    return np.concatenate([audio[chunk["start"] : chunk["end"]] for chunk in chunks])
+    return np.concatenate([audio[start:end] for start, end in chunks.tolist()])
+
+
+def collect_chunk_views(
+    audio: np.ndarray, chunks: Union[List[dict], np.ndarray]
+) -> AudioBuffer:
+    """Collects audio chunks without copying them.
+
+    The returned buffer holds views of the audio chunks and can be sliced like the
+    array returned by collect_chunks. Only the sliced samples are concatenated.
+    """
+    chunks = _as_chunks_array(chunks)
+    buffer = AudioBuffer(audio[start:end] for start, end in chunks.tolist())
+    buffer.close()
+    return buffer
+
+
+def _as_chunks_array(chunks):
+    if isinstance(chunks, np.ndarray):
+        return chunks
+    return np.array(
+        [[chunk["start"], chunk["end"]] for chunk in chunks], dtype=np.int64
+    ).reshape(-1, 2)
 
 
 class SpeechTimestampsMap:
     """Helper class to restore original speech timestamps."""
 
-    def __init__(self, chunks: List[dict], sampling_rate: int, time_precision: int = 2):
+    def __init__(
+        self,
+        chunks: Union[List[dict], np.ndarray],
+        sampling_rate: int,
+        time_precision: int = 2,
+    ):
         self.sampling_rate = sampling_rate
         self.time_precision = time_precision
-        self.chunk_end_sample = []
-        self.total_silence_before = []
 
-        previous_end = 0
-        silent_samples = 0
+        chunks = _as_chunks_array(chunks)
+        previous_ends = np.concatenate([[0], chunks[:-1, 1]])
+        silent_samples = np.cumsum(chunks[:, 0] - previous_ends)
 
-        for chunk in chunks:
-            silent_samples += chunk["start"] - previous_end
-            previous_end = chunk["end"]
+        self.chunk_end_sample = (chunks[:, 1] - silent_samples).tolist()
+        self.total_silence_before = (silent_samples / sampling_rate).tolist()
 
-            self.chunk_end_sample.append(chunk["end"] - silent_samples)
-            self.total_silence_before.append(silent_samples / sampling_rate)
+        self._previous_end = int(chunks[-1, 1]) if chunks.shape[0] else 0
+        self._silent_samples = int(silent_samples[-1]) if chunks.shape[0] else 0
+
+    def add_chunk(self, start: int, end: int) -> None:
+        """Adds a speech chunk after the previous ones, e.g. when they are streamed."""
+        self._silent_samples += start - self._previous_end
+        self._previous_end = end
+
+        # The silence is added first so that the chunk index found by other threads
+        # is always valid.
+        self.total_silence_before.append(self._silent_samples / self.sampling_rate)
+        self.chunk_end_sample.append(end - self._silent_samples)
 
     def get_original_time(
         self,
@@ -289,3 +693,38 @@ class SileroVADModel:
         state = (h, c)
 
         return out, state
+
+    def run(self, windows: np.ndarray, state, sr: int):
+        """Runs the model on consecutive windows.
+
+        This is equivalent to calling the model on each window, but the inputs are
+        prepared once for all windows.
+
+        Args:
+          windows: Array of shape (num_windows, batch_size, window_size).
+          state: Model state for batch_size audios.
+          sr: Sampling rate.
+
+        Returns:
+          A tuple with the speech probabilities of shape (num_windows, batch_size) and
+          the model state after the last window.
+        """
+        if windows.ndim != 3:
+            raise ValueError(
+                "Expected windows of shape (num_windows, batch_size, window_size)"
+            )
+        if sr / windows.shape[2] > 31.25:
+            raise ValueError("Input audio chunk is too short")
+
+        h, c = state
+        speech_probs = np.empty(windows.shape[:2], dtype=np.float32)
+        ort_inputs = {"sr": np.array(sr, dtype="int64")}
+
+        for i, window in enumerate(windows):
+            ort_inputs["input"] = window
+            ort_inputs["h"] = h
+            ort_inputs["c"] = c
+            out, h, c = self.session.run(None, ort_inputs)
+            speech_probs[i] = out[:, 0]
+
+        return speech_probs, (h, c)
@@ -10,9 +10,82 @@ document.addEventListener("DOMContentLoaded", function () {
   const fileHeader = document.getElementById("fileHeader");
   const stepOneDescription = document.getElementById("stepOneDescription");
   const generateButton = document.getElementById("generateButton"); // Added this line
+  const transcriptionForm = document.getElementById("transcription");
+  const jobIdInput = document.getElementById("jobIdInput");
 
   fileInput.addEventListener("change", updateFileDisplay);
   folderInput.addEventListener("change", updateFileDisplay);
+  transcriptionForm.addEventListener("submit", submitTranscriptionJob);
+
+  // Upload the files as a background job and follow its progress
+  function submitTranscriptionJob(event) {
+    event.preventDefault();
+    downloadButton.disabled = true;
+
+    fetch(transcriptionForm.action, {
+      method: "POST",
+      body: new FormData(transcriptionForm),
+    })
+      .then((response) =>
+        response.json().then((job) => {
+          if (!response.ok) {
+            throw new Error(job.error);
+          }
+          return job;
+        })
+      )
+      .then((job) => {
+        // The progress bars follow the order of the job files
+        displayFileNames(
+          job.files.map((file) => file.name),
+          nameDisplay
+        );
+        updateJobProgress(job);
+        followJob(job.id);
+      })
+      .catch((error) => {
+        downloadButton.disabled = false;
+        alert(error.message);
+      });
+  }
+
+  function followJob(jobId) {
+    const events = new EventSource(`/jobs/${jobId}/events`);
+
+    events.onmessage = function (event) {
+      const job = JSON.parse(event.data);
+      updateJobProgress(job);
+
+      if (job.status === "done" || job.status === "error") {
+        events.close();
+        downloadButton.disabled = false;
+
+        if (job.status === "done") {
+          jobIdInput.value = job.id;
+          window.location.href = job.download_url;
+        } else {
+          alert(job.error);
+        }
+      }
+    };
+  }
+
+  function updateJobProgress(job) {
+    job.files.forEach((file, index) => {
+      const loader = document.getElementById(`file${index}loader`);
+      if (!loader) {
+        return;
+      }
+
+      const container = loader.closest(".file-container");
+      container.querySelector(".waiting").innerText = `...(${file.status})`;
+      loader.parentElement.style.display = "block";
+      loader.style.display = "block";
+      loader.style.backgroundColor = "#4CAF50";
+      loader.style.height = "100%";
+      loader.style.width = `${file.progress}%`;
+    });
+  }
 
   function updateFileDisplay() {
     const files = fileInput.files;
@@ -58,8 +131,8 @@ document.addEventListener("DOMContentLoaded", function () {
   function displayFileNames(fileNames, displayElement) {
     displayElement.innerHTML = fileNames
       .map(
-        (name) =>
-          `<div class="file-container"><h4 class="file-name">${name}</h4><div><h4 class="waiting">...(waiting)</h4><div class="loading-bar-background"><div id="${name}loader" class="loading-bar"></div></div></div></div>`
+        (name, index) =>
+          `<div class="file-container"><h4 class="file-name">${name}</h4><div><h4 class="waiting">...(waiting)</h4><div class="loading-bar-background"><div id="file${index}loader" class="loading-bar"></div></div></div></div>`
       )
       .join("\n");
   }
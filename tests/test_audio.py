@@ -0,0 +1,99 @@
+import io
+import os
+import threading
+
+import numpy as np
+
+from faster_whisper.audio import (
+    AudioBuffer,
+    AudioDecoder,
+    decode_audio,
+    hash_audio,
+    stream_audio,
+)
+
+
+def test_decode_audio(jfk_path):
+    audio = decode_audio(jfk_path)
+
+    assert audio.dtype == np.float32
+    assert audio.shape == (176000,)
+    assert 0 < np.abs(audio).max() <= 1
+
+    with open(jfk_path, "rb") as audio_file:
+        np.testing.assert_array_equal(decode_audio(audio_file), audio)
+
+
+def test_stream_audio(jfk_path):
+    audio = decode_audio(jfk_path)
+    chunks = list(stream_audio(jfk_path, chunk_seconds=3))
+
+    assert [chunk.shape[0] for chunk in chunks[:-1]] == [48000] * (len(chunks) - 1)
+    assert all(chunk.dtype == np.float32 for chunk in chunks)
+    np.testing.assert_array_equal(np.concatenate(chunks), audio)
+
+
+def test_stream_audio_split_stereo(data_dir):
+    audio_path = os.path.join(data_dir, "stereo_diarization.wav")
+    left, right = decode_audio(audio_path, split_stereo=True)
+    chunks = list(stream_audio(audio_path, split_stereo=True, chunk_seconds=1))
+
+    np.testing.assert_array_equal(np.concatenate([c[0] for c in chunks]), left)
+    np.testing.assert_array_equal(np.concatenate([c[1] for c in chunks]), right)
+
+
+def test_decode_audio_buffer_size(data_dir):
+    audio_path = os.path.join(data_dir, "stereo_diarization.wav")
+    left, right = decode_audio(audio_path, split_stereo=True)
+
+    # The decoding buffer is not much larger than the returned samples.
+    assert left.base is right.base
+    assert left.base.nbytes <= 1.1 * (left.nbytes + right.nbytes)
+
+
+def test_audio_buffer(jfk_path):
+    audio = decode_audio(jfk_path)
+    buffer = AudioBuffer()
+
+    thread = threading.Thread(
+        target=buffer.fill, args=(stream_audio(jfk_path, chunk_seconds=1),)
+    )
+    thread.start()
+
+    assert buffer.wait(20000) >= 20000
+    np.testing.assert_array_equal(buffer[5000:20000], audio[5000:20000])
+
+    assert buffer.wait() == audio.shape[0]
+    assert buffer.finished
+    np.testing.assert_array_equal(buffer[15000:40000], audio[15000:40000])
+    np.testing.assert_array_equal(buffer[:], audio)
+
+    thread.join()
+
+
+def test_audio_decoder(jfk_path):
+    audio = decode_audio(jfk_path)
+
+    with AudioDecoder(max_pending_graphs=2) as decoder:
+        for _ in range(3):
+            np.testing.assert_array_equal(decoder.decode(jfk_path), audio)
+
+        chunks = list(decoder.stream(jfk_path, chunk_seconds=5))
+        np.testing.assert_array_equal(np.concatenate(chunks), audio)
+
+
+def test_hash_audio(jfk_path):
+    with open(jfk_path, "rb") as audio_file:
+        content = audio_file.read()
+
+    audio_file = io.BytesIO(content)
+    assert hash_audio(audio_file) == hash_audio(jfk_path)
+    assert audio_file.tell() == 0
+
+    audio_file.seek(10)
+    assert hash_audio(audio_file) != hash_audio(jfk_path)
+    assert audio_file.tell() == 10
+
+    waveform = np.zeros(16000, dtype=np.float32)
+    assert hash_audio(waveform) != hash_audio(waveform.astype(np.float64))
+    assert hash_audio(waveform) == hash_audio(np.zeros(32000, dtype=np.float32)[::2])
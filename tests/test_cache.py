@@ -0,0 +1,179 @@
+import os
+import time
+
+import numpy as np
+
+from faster_whisper.cache import FeatureCache, TranscriptionCache
+from faster_whisper.feature_extractor import FeatureExtractor, StreamingFeatures
+from faster_whisper.transcribe import (
+    Segment,
+    TranscriptionInfo,
+    TranscriptionOptions,
+    Word,
+)
+from faster_whisper.vad import VadOptions
+
+
+def _make_result(text):
+    words = [Word(start=0.0, end=0.5, word=" " + text, probability=0.9)]
+    segment = Segment(
+        id=1,
+        seek=3000,
+        start=0.0,
+        end=0.5,
+        text=" " + text,
+        tokens=[50364, 400, 50389],
+        temperature=0.0,
+        avg_logprob=-0.25,
+        compression_ratio=1.1,
+        no_speech_prob=0.01,
+        words=words,
+    )
+    options = TranscriptionOptions(
+        beam_size=5,
+        best_of=5,
+        patience=1,
+        length_penalty=1,
+        repetition_penalty=1,
+        no_repeat_ngram_size=0,
+        log_prob_threshold=-1.0,
+        no_speech_threshold=0.6,
+        compression_ratio_threshold=2.4,
+        condition_on_previous_text=True,
+        prompt_reset_on_temperature=0.5,
+        temperatures=[0.0, 0.2],
+        initial_prompt=None,
+        prefix=None,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+        without_timestamps=False,
+        max_initial_timestamp=1.0,
+        word_timestamps=True,
+        prepend_punctuations="\"'“¿([{-",
+        append_punctuations="\"'.。,，!！?？:：”)]}、",
+        batch_size=1,
+        speculative_fallback=0,
+        alignment_batch_size=1,
+    )
+    info = TranscriptionInfo(
+        language="en",
+        language_probability=0.99,
+        duration=11.0,
+        duration_after_vad=10.5,
+        all_language_probs=[("en", 0.99), ("fr", 0.01)],
+        transcription_options=options,
+        vad_options=VadOptions(min_silence_duration_ms=500),
+    )
+    return [segment, segment._replace(id=2, words=None)], info
+
+
+def test_transcription_cache(tmp_path):
+    cache = TranscriptionCache(str(tmp_path))
+    segments, info = _make_result("hello")
+
+    key = cache.make_key("0123", "tiny", beam_size=5, vad_parameters=VadOptions())
+    assert key != cache.make_key("0123", "tiny", beam_size=1)
+    assert key != cache.make_key("0123", "base", beam_size=5)
+    assert key == cache.make_key(
+        "0123", "tiny", vad_parameters=VadOptions(), beam_size=5
+    )
+
+    assert cache.get(key) is None
+    cache.put(key, segments, info)
+    assert cache.get(key) == (segments, info)
+
+    # A corrupted file is a cache miss.
+    with open(os.path.join(str(tmp_path), key + ".json"), "w") as result_file:
+        result_file.write("{")
+    assert cache.get(key) is None
+
+
+def test_transcription_cache_eviction(tmp_path):
+    cache = TranscriptionCache(str(tmp_path))
+    segments, info = _make_result("hello")
+
+    cache.put("a", segments, info)
+    result_size = os.path.getsize(os.path.join(str(tmp_path), "a.json"))
+    cache.max_size = 2 * result_size
+
+    now = time.time()
+    os.utime(os.path.join(str(tmp_path), "a.json"), (now - 20, now - 20))
+    cache.put("b", segments, info)
+    os.utime(os.path.join(str(tmp_path), "b.json"), (now - 10, now - 10))
+
+    # Reading "a" makes "b" the least recently used result.
+    assert cache.get("a") is not None
+    cache.put("c", segments, info)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_feature_cache(tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    feature_extractor = FeatureExtractor()
+    waveform = np.random.default_rng(0).standard_normal(45 * 16000).astype(np.float32)
+    vad_options = VadOptions(min_silence_duration_ms=500)
+    speech_chunks = np.array([[16000, 320000], [400000, 720000]], dtype=np.int64)
+
+    assert cache.get_speech_chunks("0123", vad_options) is None
+    cache.put_speech_chunks("0123", vad_options, speech_chunks, waveform.shape[0])
+    cached_chunks, num_samples = cache.get_speech_chunks("0123", vad_options)
+    np.testing.assert_array_equal(cached_chunks, speech_chunks)
+    assert num_samples == waveform.shape[0]
+    assert cache.get_speech_chunks("0123", VadOptions()) is None
+
+    features = StreamingFeatures(feature_extractor, waveform)
+    expected = feature_extractor(waveform)
+
+    assert cache.get_features("0123", feature_extractor) is None
+    stored_features = cache.put_features("0123", features, waveform.shape[0])
+    cached_features, num_samples, cached_chunks = cache.get_features(
+        "0123", feature_extractor
+    )
+
+    assert isinstance(cached_features, np.memmap)
+    assert cached_features.dtype == np.float16
+    assert cached_features.shape == expected.shape
+    np.testing.assert_array_equal(cached_features, stored_features)
+    np.testing.assert_allclose(cached_features, expected, atol=2e-3)
+    assert num_samples == waveform.shape[0]
+    assert cached_chunks is None
+
+    assert cache.get_features("0123", feature_extractor, vad_options) is None
+    assert cache.get_features("0123", FeatureExtractor(feature_size=128)) is None
+
+    cache.put_features("0123", features, waveform.shape[0], vad_options, speech_chunks)
+    _, _, cached_chunks = cache.get_features("0123", feature_extractor, vad_options)
+    np.testing.assert_array_equal(cached_chunks, speech_chunks)
+
+
+def test_feature_cache_eviction(tmp_path):
+    feature_extractor = FeatureExtractor()
+    waveform = np.zeros(30 * 16000, dtype=np.float32)
+    features = StreamingFeatures(feature_extractor, waveform)
+
+    cache = FeatureCache(str(tmp_path))
+    cache.put_features("a", features, waveform.shape[0])
+    cache.max_size = sum(entry.stat().st_size for entry in os.scandir(str(tmp_path)))
+    cache.put_features("b", features, waveform.shape[0])
+
+    # The features and metadata files of the least recently used entry are removed.
+    assert len(os.listdir(str(tmp_path))) == 2
+    assert cache.get_features("a", feature_extractor) is None
+    assert cache.get_features("b", feature_extractor) is not None
+
+
+def test_feature_cache_entry_larger_than_max_size(tmp_path):
+    feature_extractor = FeatureExtractor()
+    waveform = np.random.default_rng(0).standard_normal(30 * 16000).astype(np.float32)
+    features = StreamingFeatures(feature_extractor, waveform)
+
+    cache = FeatureCache(str(tmp_path), max_size=100000)
+    stored_features = cache.put_features("a", features, waveform.shape[0])
+
+    # The entry is evicted immediately but the returned features remain readable.
+    assert cache.get_features("a", feature_extractor) is None
+    assert stored_features.shape == features.shape
+    np.testing.assert_allclose(stored_features, feature_extractor(waveform), atol=2e-3)
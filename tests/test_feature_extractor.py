@@ -0,0 +1,133 @@
+import os
+import threading
+
+import numpy as np
+
+from faster_whisper.audio import AudioBuffer
+from faster_whisper.feature_extractor import FeatureExtractor, StreamingFeatures
+
+
+def test_fram_wave():
+    feature_extractor = FeatureExtractor()
+    waveform = np.random.default_rng(0).standard_normal(16123).astype(np.float32)
+
+    frames = feature_extractor.fram_wave(waveform)
+
+    assert frames.shape == (16123 // 160 + 1, 400)
+    assert frames.dtype == np.float32
+
+    # Frames are centered on i * hop_length and reflected at the edges.
+    padded = np.pad(waveform, 200, mode="reflect")
+    for i in (0, 1, 50, frames.shape[0] - 2, frames.shape[0] - 1):
+        np.testing.assert_array_equal(frames[i], padded[i * 160 : i * 160 + 400])
+
+    np.testing.assert_array_equal(frames[10], waveform[1400:1800])
+
+
+def test_stft():
+    feature_extractor = FeatureExtractor()
+    waveform = np.random.default_rng(0).standard_normal(16000).astype(np.float32)
+    window = np.hanning(401)[:-1]
+
+    frames = feature_extractor.fram_wave(waveform)
+    stft = feature_extractor.stft(frames, window=window)
+
+    assert stft.shape == (201, frames.shape[0])
+    assert stft.dtype == np.complex64
+
+    expected = np.fft.fft(frames * window, axis=-1)[:, :201].T
+    np.testing.assert_allclose(stft, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_streaming_features():
+    feature_extractor = FeatureExtractor()
+    waveform = np.random.default_rng(0).standard_normal(75 * 16000).astype(np.float32)
+
+    features = feature_extractor(waveform)
+    streaming_features = StreamingFeatures(feature_extractor, waveform)
+
+    assert streaming_features.shape == features.shape
+
+    for start, end in [(0, 3000), (2500, 5500), (7000, 10500), (0, features.shape[-1])]:
+        np.testing.assert_allclose(
+            streaming_features[:, start:end], features[:, start:end], atol=1e-5
+        )
+
+
+def test_memory_mapped_features(tmp_path):
+    feature_extractor = FeatureExtractor()
+    waveform = np.random.default_rng(0).standard_normal(75 * 16000).astype(np.float32)
+
+    streaming_features = StreamingFeatures(feature_extractor, waveform)
+    mapped_features = StreamingFeatures(
+        feature_extractor, waveform, mmap=True, mmap_dir=str(tmp_path)
+    )
+
+    assert mapped_features.shape == streaming_features.shape
+    assert mapped_features.max_value == streaming_features.max_value
+
+    for start, end in [(0, 3000), (2500, 5500), (7000, 10500), (0, 10500)]:
+        np.testing.assert_array_equal(
+            mapped_features[:, start:end], streaming_features[:, start:end]
+        )
+
+    # The temporary file is already removed from the directory.
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_streaming_features_from_audio_buffer():
+    feature_extractor = FeatureExtractor()
+    waveform = np.random.default_rng(0).standard_normal(75 * 16000).astype(np.float32)
+    chunks = np.array_split(waveform, 20)
+
+    features = feature_extractor(waveform)
+    buffer = AudioBuffer(chunks[:5])
+    streaming_features = StreamingFeatures(feature_extractor, buffer)
+
+    assert streaming_features.streaming
+    assert streaming_features.get_content_frames(100) == (300000 - 200) // 160
+
+    thread = threading.Thread(target=buffer.fill, args=(chunks[5:],))
+    thread.start()
+
+    assert streaming_features.get_content_frames(4000) >= 4000
+    assert streaming_features.get_content_frames(10000) == features.shape[-1] - 3000
+    assert streaming_features.shape == features.shape
+
+    # The random noise has the same level everywhere, so the maximum value of the
+    # first block is the global maximum up to a small difference.
+    for start, end in [(0, 3000), (2500, 5500), (7000, 10500)]:
+        np.testing.assert_allclose(
+            streaming_features[:, start:end], features[:, start:end], atol=1e-2
+        )
+
+    thread.join()
+
+
+def test_streaming_features_computed_once(monkeypatch):
+    feature_extractor = FeatureExtractor()
+    waveform = np.random.default_rng(0).standard_normal(75 * 16000).astype(np.float32)
+    expected = feature_extractor(waveform)
+
+    num_computed_blocks = 0
+    log_mel_spectrogram = feature_extractor.log_mel_spectrogram
+
+    def count_blocks(frames):
+        nonlocal num_computed_blocks
+        num_computed_blocks += 1
+        return log_mel_spectrogram(frames)
+
+    monkeypatch.setattr(feature_extractor, "log_mel_spectrogram", count_blocks)
+
+    # The blocks of the first pass are kept for short audio.
+    streaming_features = StreamingFeatures(feature_extractor, waveform)
+    np.testing.assert_allclose(streaming_features[:, :], expected, atol=1e-5)
+    assert num_computed_blocks == streaming_features.num_blocks
+
+    # Longer audio is computed again when it is read.
+    num_computed_blocks = 0
+    streaming_features = StreamingFeatures(
+        feature_extractor, waveform, max_resident_blocks=2
+    )
+    np.testing.assert_allclose(streaming_features[:, :], expected, atol=1e-5)
+    assert num_computed_blocks == 2 * streaming_features.num_blocks
@@ -0,0 +1,62 @@
+from faster_whisper import WhisperModel
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_consecutive_timestamps, get_last_timestamp
+
+
+def test_split_on_unicode():
+    model = WhisperModel("tiny")
+    tokenizer = Tokenizer(model.hf_tokenizer, False)
+
+    tokens = [8404, 871, 287, 6, 246, 526, 3210, 20378]
+    words, word_tokens = tokenizer.split_tokens_on_unicode(tokens)
+
+    assert words == [" elle", " est", " l", "'", "�", "é", "rit", "oire"]
+    assert word_tokens == [[8404], [871], [287], [6], [246], [526], [3210], [20378]]
+
+
+def test_split_on_unicode_with_timestamps():
+    model = WhisperModel("tiny")
+    tokenizer = Tokenizer(model.hf_tokenizer, True, "transcribe", "ja")
+
+    tokens = tokenizer.encode("こんにちは、世界！")
+    tokens += [tokenizer.timestamp_begin + 50, tokenizer.eot]
+    words, word_tokens = tokenizer.split_to_word_tokens(tokens)
+
+    # The last character is made of 3 tokens which are kept in the same word.
+    assert words == ["こんにちは", "、", "世界", "！", "<|1.00|>", ""]
+    assert word_tokens[3] == tokens[3:6]
+    assert "".join(words) == tokenizer.decode_with_timestamps(tokens)
+
+
+def test_timestamp_mask():
+    model = WhisperModel("tiny")
+    tokenizer = Tokenizer(model.hf_tokenizer, True, "transcribe", "en")
+
+    begin = tokenizer.timestamp_begin
+    tokens = [begin, 440, 1002, begin + 50, begin + 50, 50, begin + 90, tokenizer.eot]
+    is_timestamp = tokenizer.is_timestamp(tokens)
+
+    assert is_timestamp.tolist() == [True, False, False, True, True, False, True, False]
+    assert get_consecutive_timestamps(is_timestamp) == [4]
+    assert get_last_timestamp(tokens, is_timestamp) == begin + 90
+    assert get_last_timestamp(tokens[1:3], is_timestamp[1:3]) is None
+
+
+def test_shared_token_bytes():
+    model = WhisperModel("tiny")
+    token_bytes = {}
+    tokens = [8404, 871, 287, 6, 246, 526, 3210, 20378]
+
+    tokenizer = Tokenizer(model.hf_tokenizer, False, token_bytes=token_bytes)
+    words, word_tokens = tokenizer.split_tokens_on_unicode(tokens)
+
+    assert sorted(token_bytes) == sorted(tokens)
+
+    # Another tokenizer reuses the bytes found by the first one.
+    other_tokenizer = Tokenizer(model.hf_tokenizer, False, token_bytes=token_bytes)
+    token_bytes[8404] = b" ELLE"
+
+    assert other_tokenizer.split_tokens_on_unicode(tokens) == (
+        [" ELLE"] + words[1:],
+        word_tokens,
+    )
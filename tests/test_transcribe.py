@@ -1,6 +1,17 @@
 import os
 
-from faster_whisper import WhisperModel, decode_audio
+import numpy as np
+import pytest
+
+from faster_whisper import FeatureCache, WhisperModel, decode_audio
+from faster_whisper.transcribe import (
+    Segment,
+    Transcript,
+    Word,
+    WordTimings,
+    merge_punctuations,
+    restore_speech_timestamps,
+)
 
 
 def test_supported_languages():
@@ -81,6 +92,239 @@ def test_vad(jfk_path):
     assert info.vad_options.speech_pad_ms == 200
 
 
+def test_transcribe_many(jfk_path):
+    model = WhisperModel("tiny", num_workers=2)
+    progress = []
+
+    results = model.transcribe_many(
+        [jfk_path, jfk_path, jfk_path],
+        max_concurrency=2,
+        segment_callback=lambda index, segment, info: progress.append(index),
+        language="en",
+    )
+    results = sorted(results, key=lambda result: result[0])
+
+    assert [index for index, _, _ in results] == [0, 1, 2]
+    assert sorted(set(progress)) == [0, 1, 2]
+
+    for _, segments, info in results:
+        assert info.language == "en"
+        assert len(segments) == 1
+        assert segments[0].text == (
+            " And so my fellow Americans ask not what your country can do for you, "
+            "ask what you can do for your country."
+        )
+
+
+def test_batched_transcription(jfk_path):
+    model = WhisperModel("tiny")
+
+    # Place the same speech at the start of 3 consecutive 30-second windows.
+    audio = decode_audio(jfk_path)
+    window = np.pad(audio, (0, 30 * 16000 - audio.shape[0]))
+    audio = np.concatenate([window, window, audio])
+
+    segments, info = model.transcribe(
+        audio,
+        condition_on_previous_text=False,
+        batch_size=3,
+        word_timestamps=True,
+    )
+    segments = list(segments)
+
+    assert info.transcription_options.batch_size == 3
+    assert len(segments) == 3
+
+    for i, segment in enumerate(segments):
+        assert segment.text == (
+            " And so my fellow Americans ask not what your country can do for you, "
+            "ask what you can do for your country."
+        )
+        assert segment.text == "".join(word.word for word in segment.words)
+        assert 30 * i <= segment.start < segment.end <= 30 * (i + 1)
+
+
+def test_streaming_transcription(jfk_path):
+    model = WhisperModel("tiny")
+
+    segments, info = model.transcribe(jfk_path, streaming=True, word_timestamps=True)
+    segments = list(segments)
+
+    assert info.language == "en"
+    assert round(info.duration) == 11
+    assert len(segments) == 1
+    assert segments[0].text == (
+        " And so my fellow Americans ask not what your country can do for you, "
+        "ask what you can do for your country."
+    )
+
+
+def test_streaming_vad(jfk_path):
+    model = WhisperModel("tiny")
+    vad_parameters = dict(min_silence_duration_ms=500, speech_pad_ms=200)
+
+    segments, _ = model.transcribe(
+        jfk_path, vad_filter=True, vad_parameters=vad_parameters
+    )
+    streamed_segments, info = model.transcribe(
+        jfk_path, vad_filter=True, vad_parameters=vad_parameters, streaming=True
+    )
+    segments = list(segments)
+    streamed_segments = list(streamed_segments)
+
+    assert info.duration_after_vad == info.duration
+    assert [segment.text for segment in streamed_segments] == [
+        segment.text for segment in segments
+    ]
+    assert [segment.start for segment in streamed_segments] == [
+        segment.start for segment in segments
+    ]
+
+
+def test_feature_cache(jfk_path, tmp_path):
+    model = WhisperModel("tiny")
+    feature_cache = FeatureCache(str(tmp_path))
+
+    segments, info = model.transcribe(
+        jfk_path, vad_filter=True, feature_cache=feature_cache
+    )
+    segments = list(segments)
+    cached_segments, cached_info = model.transcribe(
+        jfk_path, vad_filter=True, feature_cache=feature_cache, beam_size=1
+    )
+    cached_segments = list(cached_segments)
+
+    assert cached_info.duration == info.duration
+    assert cached_info.duration_after_vad == info.duration_after_vad
+    assert len(cached_segments) == 1
+    assert cached_segments[0].text == segments[0].text
+    assert cached_segments[0].start == segments[0].start
+
+
+def test_detect_languages(jfk_path):
+    model = WhisperModel("tiny")
+    audio = decode_audio(jfk_path)
+
+    detections = model.detect_languages([jfk_path, audio, audio[16000:]], batch_size=2)
+
+    assert len(detections) == 3
+    for detection in detections:
+        assert detection.language == "en"
+        assert detection.language_probability > 0.9
+
+    segments, info = model.transcribe(jfk_path)
+    detected_segments, detected_info = model.transcribe(detections[0])
+
+    assert detected_info.language == info.language
+    assert detected_info.duration == info.duration
+    assert detected_info.language_probability == pytest.approx(
+        info.language_probability, abs=1e-3
+    )
+    assert [segment.text for segment in detected_segments] == [
+        segment.text for segment in segments
+    ]
+
+
+def test_speculative_fallback(jfk_path):
+    model = WhisperModel("tiny", num_workers=3)
+
+    # The same temperature is repeated so that all decodings return the same result.
+    kwargs = dict(temperature=[0.0, 0.0, 0.0], log_prob_threshold=0.0)
+    segments, _ = model.transcribe(jfk_path, **kwargs)
+    speculative_segments, info = model.transcribe(
+        jfk_path, speculative_fallback=2, **kwargs
+    )
+    segments = list(segments)
+    speculative_segments = list(speculative_segments)
+
+    assert info.transcription_options.speculative_fallback == 2
+    assert speculative_segments == segments
+
+
+def test_deferred_word_alignment(jfk_path):
+    model = WhisperModel("tiny")
+
+    # Place the same speech at the start of 3 consecutive 30-second windows.
+    audio = decode_audio(jfk_path)
+    window = np.pad(audio, (0, 30 * 16000 - audio.shape[0]))
+    audio = np.concatenate([window, window, audio])
+
+    segments, _ = model.transcribe(audio, word_timestamps=True)
+    deferred_segments, info = model.transcribe(
+        audio, word_timestamps=True, alignment_batch_size=3
+    )
+    segments = list(segments)
+    deferred_segments = list(deferred_segments)
+
+    assert info.transcription_options.alignment_batch_size == 3
+    assert [segment.id for segment in deferred_segments] == [1, 2, 3]
+    assert [segment.text for segment in deferred_segments] == [
+        segment.text for segment in segments
+    ]
+
+    for segment, deferred_segment in zip(segments, deferred_segments):
+        assert deferred_segment.text == "".join(
+            word.word for word in deferred_segment.words
+        )
+        assert deferred_segment.words[0].start == pytest.approx(
+            segment.words[0].start, abs=0.1
+        )
+
+
+def test_merge_punctuations():
+    alignment = WordTimings(
+        word=[" (", "hello", ",", " world", ")", "."],
+        num_tokens=np.array([1, 1, 1, 1, 1, 1]),
+        start=np.arange(6, dtype=np.float64),
+        end=np.arange(1, 7, dtype=np.float64),
+        probability=np.ones(6),
+    )
+
+    merge_punctuations(alignment, "\"'“¿([{-", "\"'.。,，!！?？:：”)]}、")
+
+    assert alignment.word == ["", " (hello,", "", " world).", "", ""]
+    assert alignment.num_tokens.tolist() == [0, 3, 0, 3, 0, 0]
+
+
+def test_transcript():
+    words = [
+        Word(start=1.2, end=1.56, word=" Hello", probability=0.9),
+        Word(start=1.56, end=2.04, word=" world.", probability=0.8),
+    ]
+    segment = Segment(
+        id=1,
+        seek=0,
+        start=1.2,
+        end=2.04,
+        text=" Hello world.",
+        tokens=[50364, 2425, 1002, 13, 50466],
+        temperature=0.0,
+        avg_logprob=-0.25,
+        compression_ratio=0.8,
+        no_speech_prob=0.01,
+        words=words,
+    )
+    segments = [segment, segment._replace(id=2, start=31.5, end=32.25, words=None)]
+
+    transcript = Transcript.from_segments(segments)
+
+    assert len(transcript) == 2
+    assert list(transcript) == segments
+    assert transcript[-1] == segments[-1]
+    assert transcript[:1] == segments[:1]
+
+    speech_chunks = [dict(start=16000, end=48000), dict(start=480000, end=1000000)]
+    restored_segments = list(restore_speech_timestamps(segments, speech_chunks, 16000))
+
+    # Segments can be restored as they are appended.
+    partial_transcript = Transcript.from_segments(segments)
+    partial_transcript.restore_speech_timestamps(speech_chunks, 16000, start=1)
+    assert list(partial_transcript) == [segments[0], restored_segments[1]]
+
+    transcript.restore_speech_timestamps(speech_chunks, 16000)
+    assert list(transcript) == restored_segments
+
+
 def test_stereo_diarization(data_dir):
     model = WhisperModel("tiny")
 
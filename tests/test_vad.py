@@ -0,0 +1,199 @@
+import threading
+
+import numpy as np
+
+from faster_whisper import decode_audio
+from faster_whisper.audio import AudioBuffer
+from faster_whisper.feature_extractor import FeatureExtractor, StreamingFeatures
+from faster_whisper.vad import (
+    SpeechTimestampsMap,
+    VadOptions,
+    _find_speech_chunks,
+    _SpeechChunkTracker,
+    collect_chunk_views,
+    collect_chunks,
+    get_speech_chunks,
+    get_speech_probs,
+    get_speech_timestamps,
+    get_vad_model,
+    stream_speech_chunks,
+)
+
+
+def test_get_speech_probs(jfk_path):
+    audio = decode_audio(jfk_path)
+    model = get_vad_model()
+
+    # Reference: call the model on each window.
+    state = model.get_initial_state(batch_size=1)
+    expected = []
+    for start in range(0, audio.shape[0], 1024):
+        window = audio[start : start + 1024]
+        window = np.pad(window, (0, 1024 - window.shape[0]))
+        speech_prob, state = model(window, state, 16000)
+        expected.append(speech_prob[0, 0])
+
+    speech_probs = get_speech_probs(audio, 1024)
+
+    assert speech_probs.shape == (len(expected),)
+    np.testing.assert_allclose(speech_probs, expected, atol=1e-6)
+
+    batch_speech_probs = get_speech_probs(np.stack([audio, audio[::-1]]), 1024)
+
+    assert batch_speech_probs.shape == (2, len(expected))
+    np.testing.assert_allclose(batch_speech_probs[0], speech_probs, atol=1e-5)
+    np.testing.assert_allclose(
+        batch_speech_probs[1], get_speech_probs(audio[::-1].copy(), 1024), atol=1e-5
+    )
+
+
+def test_get_speech_timestamps(jfk_path):
+    audio = decode_audio(jfk_path)
+    silence = np.zeros(3 * 16000, dtype=np.float32)
+    audio = np.concatenate([silence, audio, silence, audio])
+
+    speech_timestamps = get_speech_timestamps(
+        audio, min_silence_duration_ms=500, speech_pad_ms=200
+    )
+
+    assert len(speech_timestamps) > 1
+    assert all(chunk["start"] < chunk["end"] for chunk in speech_timestamps)
+    assert 2 * 16000 < speech_timestamps[0]["start"] < 4 * 16000
+    assert speech_timestamps[-1]["end"] <= audio.shape[0]
+
+
+def test_sharded_speech_timestamps(jfk_path):
+    audio = decode_audio(jfk_path)
+    silence = np.zeros(5 * 16000, dtype=np.float32)
+    audio = np.concatenate([silence, audio] * 8)
+
+    speech_timestamps = get_speech_timestamps(audio)
+    sharded_speech_timestamps = get_speech_timestamps(
+        audio, shard_duration_s=30, shard_overlap_s=15
+    )
+
+    assert len(sharded_speech_timestamps) == len(speech_timestamps)
+    for chunk, sharded_chunk in zip(speech_timestamps, sharded_speech_timestamps):
+        assert abs(chunk["start"] - sharded_chunk["start"]) <= 3 * 1024
+        assert abs(chunk["end"] - sharded_chunk["end"]) <= 3 * 1024
+
+
+def test_speech_chunks_array(jfk_path):
+    audio = decode_audio(jfk_path)
+    silence = np.zeros(3 * 16000, dtype=np.float32)
+    audio = np.concatenate([silence, audio, silence, audio])
+
+    for vad_options in (
+        VadOptions(min_silence_duration_ms=500, speech_pad_ms=200),
+        VadOptions(min_silence_duration_ms=100, max_speech_duration_s=4),
+    ):
+        speech_chunks = get_speech_chunks(audio, vad_options)
+        speech_timestamps = get_speech_timestamps(audio, vad_options)
+
+        assert speech_chunks.dtype == np.int64
+        assert speech_chunks.tolist() == [
+            [chunk["start"], chunk["end"]] for chunk in speech_timestamps
+        ]
+
+        np.testing.assert_array_equal(
+            collect_chunks(audio, speech_chunks),
+            collect_chunks(audio, speech_timestamps),
+        )
+
+        timestamps_map = SpeechTimestampsMap(speech_chunks, 16000)
+        expected_map = SpeechTimestampsMap(speech_timestamps, 16000)
+        assert timestamps_map.chunk_end_sample == expected_map.chunk_end_sample
+        assert timestamps_map.total_silence_before == expected_map.total_silence_before
+
+
+def test_collect_chunk_views(jfk_path):
+    audio = decode_audio(jfk_path)
+    silence = np.zeros(3 * 16000, dtype=np.float32)
+    audio = np.concatenate([silence, audio, silence, audio])
+
+    speech_chunks = get_speech_chunks(audio, min_silence_duration_ms=100)
+    collected = collect_chunks(audio, speech_chunks)
+    views = collect_chunk_views(audio, speech_chunks)
+
+    assert len(speech_chunks) > 2
+    assert views.finished
+    assert views.shape == collected.shape
+    np.testing.assert_array_equal(views[:], collected)
+    np.testing.assert_array_equal(views[12345:54321], collected[12345:54321])
+
+    # Slices within a chunk are views of the original audio.
+    start, end = speech_chunks[0].tolist()
+    assert np.shares_memory(views[10 : end - start - 10], audio)
+
+    feature_extractor = FeatureExtractor()
+    features = StreamingFeatures(feature_extractor, views)
+    expected_features = StreamingFeatures(feature_extractor, collected)
+    assert features.shape == expected_features.shape
+    np.testing.assert_array_equal(features[:, :3000], expected_features[:, :3000])
+
+    assert collect_chunk_views(audio, speech_chunks[:0]).shape == (0,)
+
+
+def test_stream_speech_chunks(jfk_path):
+    audio = decode_audio(jfk_path)
+    silence = np.zeros(3 * 16000, dtype=np.float32)
+    audio = np.concatenate([silence, audio, silence, audio])
+
+    for vad_options in (
+        VadOptions(min_silence_duration_ms=500, speech_pad_ms=200),
+        VadOptions(min_silence_duration_ms=100, max_speech_duration_s=4),
+    ):
+        speech_chunks = get_speech_chunks(audio, vad_options)
+        streamed_chunks = list(
+            stream_speech_chunks(audio, vad_options, block_size_samples=16000)
+        )
+
+        assert streamed_chunks == [tuple(chunk) for chunk in speech_chunks.tolist()]
+
+        timestamps_map = SpeechTimestampsMap([], 16000)
+        for start, end in streamed_chunks:
+            timestamps_map.add_chunk(start, end)
+
+        expected_map = SpeechTimestampsMap(speech_chunks, 16000)
+        assert timestamps_map.chunk_end_sample == expected_map.chunk_end_sample
+        assert timestamps_map.total_silence_before == expected_map.total_silence_before
+
+    # The first chunk is found before the end of the audio.
+    vad_options = VadOptions(min_silence_duration_ms=500, speech_pad_ms=200)
+    buffer = AudioBuffer([audio[: 16 * 16000]])
+    streamed_chunks = stream_speech_chunks(buffer, vad_options, 16000)
+    assert next(streamed_chunks) == tuple(
+        get_speech_chunks(audio, vad_options)[0].tolist()
+    )
+
+    thread = threading.Thread(target=buffer.fill, args=([audio[16 * 16000 :]],))
+    thread.start()
+    assert len(list(streamed_chunks)) == len(get_speech_chunks(audio, vad_options)) - 1
+    thread.join()
+
+
+def test_speech_chunks_at_threshold():
+    vad_options = VadOptions(min_silence_duration_ms=100, speech_pad_ms=0)
+    rng = np.random.default_rng(0)
+
+    # Probabilities equal to the thresholds in single precision.
+    values = np.array([0.1, 0.35, 0.5, 0.9], dtype=np.float32)
+
+    for _ in range(50):
+        speech_probs = rng.choice(values, size=200)
+        tracker = _SpeechChunkTracker(vad_options)
+        for block in np.array_split(speech_probs, 4):
+            tracker.process(block)
+
+        expected = _find_speech_chunks(
+            speech_probs,
+            tracker.threshold,
+            tracker.window_size_samples,
+            tracker.min_speech_samples,
+            tracker.min_silence_samples,
+            200 * tracker.window_size_samples,
+        )
+
+        np.testing.assert_array_equal(
+            tracker.finish(200 * tracker.window_size_samples), expected
+        )